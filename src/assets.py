@@ -0,0 +1,295 @@
+import errno
+import hashlib
+import json
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+
+"""
+Publishing of the static/ directory into public/.
+copy_files wipes the destination and copies everything again, parallel_copy_files does the same on a thread pool.
+sync_files keeps a manifest of what was published last time and only touches files that changed.
+Both of them publish each file with one of PUBLISH_MODES (see publish_file).
+"""
+
+DEFAULT_MANIFEST = os.path.join(".cache", "static_manifest.json")
+# copy: shutil.copy, hardlink/symlink: link to the source instead of duplicating it,
+# kernel: copy_file_range (reflink on btrfs/XFS) or sendfile, the data never goes through Python
+PUBLISH_MODES = ("copy", "hardlink", "symlink", "kernel")
+
+
+def copy_files(src, dst, is_root=True) -> int:
+    """ Clean copy of src into dst. Returns the number of files copied """
+    if os.path.exists(dst) and is_root:
+        shutil.rmtree(dst)
+    if is_root:
+        os.mkdir(dst)
+    copied = 0
+    for content in os.listdir(src):
+        src_path = os.path.join(src, content)
+        dst_path = os.path.join(dst, content)
+        if os.path.isfile(src_path):
+            shutil.copy(src_path, dst_path)
+            copied += 1
+        elif os.path.isdir(src_path):
+            os.mkdir(dst_path)
+            copied += copy_files(src_path, dst_path, is_root=False)
+    return copied
+
+
+def file_hash(path) -> str:
+    with open(path, "rb") as f:
+        return hashlib.file_digest(f, "sha256").hexdigest()
+
+
+def file_entry(path) -> dict:
+    """ The manifest entry of a file: {"size", "mtime_ns", "sha256"} """
+    st = os.stat(path)
+    return {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "sha256": file_hash(path)}
+
+
+def asset_entry(path, mode) -> dict:
+    """ The manifest entry of an asset published with mode: its file_entry and {"mode"} """
+    return dict(file_entry(path), mode=mode)
+
+
+def load_json(path) -> dict:
+    """ The json object in path, empty if the file is missing, unreadable or not an object """
+    try:
+        with open(path) as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(data, dict):
+        return {}
+    return data
+
+
+def save_text(path, text):
+    """ Writes text to path through a temporary file renamed over it, so path is never half written """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+
+def save_json(path, data):
+    """ Writes data to path as json, see save_text """
+    save_text(path, json.dumps(data, indent=1, sort_keys=True))
+
+
+def load_manifest(path) -> dict:
+    """ Returns {relative path: {"size", "mtime_ns", "sha256", "mode"}}, empty if there is no usable manifest """
+    return load_json(path)
+
+
+def save_manifest(path, manifest):
+    save_json(path, manifest)
+
+
+def save_paths(path, paths):
+    """ Writes paths one per line, e.g. for rsync --files-from or a CDN purge, see save_text """
+    save_text(path, "".join(p + "\n" for p in paths))
+
+
+def scan_tree(src):
+    """
+    Walks src once with os.scandir.
+    Returns (dirs, files): the relative directories in creation order, and {relative file: os.stat_result}.
+    Relative paths use / separators.
+    """
+    dirs = []
+    files = {}
+    stack = [""]
+    while stack:
+        rel_dir = stack.pop()
+        with os.scandir(os.path.join(src, rel_dir)) as it:
+            for entry in it:
+                rel = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+                if entry.is_dir():
+                    dirs.append(rel)
+                    stack.append(rel)
+                elif entry.is_file():
+                    files[rel] = entry.stat()
+    return dirs, files
+
+
+def list_files(src) -> dict:
+    """ Maps every file under src (relative, with / separators) to its os.stat_result """
+    return scan_tree(src)[1]
+
+
+def kernel_copy(src_path, dst_path):
+    """ Copies the file data inside the kernel, with copy_file_range when available and sendfile otherwise """
+    copy_file_range = getattr(os, "copy_file_range", None)
+    if copy_file_range is None and not hasattr(os, "sendfile"):
+        raise OSError(errno.ENOSYS, "no kernel copy available", src_path)
+    with open(src_path, "rb") as fsrc, open(dst_path, "wb") as fdst:
+        remaining = os.fstat(fsrc.fileno()).st_size
+        offset = 0
+        while remaining > 0:
+            if copy_file_range is not None:
+                n = copy_file_range(fsrc.fileno(), fdst.fileno(), remaining)
+            else:
+                n = os.sendfile(fdst.fileno(), fsrc.fileno(), offset, remaining)
+            if n == 0:
+                break
+            offset += n
+            remaining -= n
+    shutil.copymode(src_path, dst_path)
+
+
+def publish_file(src_path, dst_path, mode="copy") -> str:
+    """
+    Puts src_path at dst_path using mode (one of PUBLISH_MODES), replacing whatever dst_path was.
+    If the filesystem refuses the mode (cross-device link, no symlink support, no copy_file_range...)
+    it falls back to a plain shutil.copy. Returns the mode that was actually used.
+    """
+    if mode not in PUBLISH_MODES:
+        raise ValueError(f"Unknown publish mode {mode}")
+    # never write through an old hardlink/symlink into the source
+    if os.path.lexists(dst_path):
+        os.remove(dst_path)
+    if mode == "copy":
+        shutil.copy(src_path, dst_path)
+        return mode
+    try:
+        if mode == "hardlink":
+            os.link(src_path, dst_path)
+        elif mode == "symlink":
+            os.symlink(os.path.abspath(src_path), dst_path)
+        else:
+            kernel_copy(src_path, dst_path)
+        return mode
+    except OSError:
+        if os.path.lexists(dst_path):
+            os.remove(dst_path)
+    shutil.copy(src_path, dst_path)
+    return "copy"
+
+
+def published_with(src_path, dst_path, mode) -> bool:
+    """
+    True when dst_path is what mode makes of src_path: a symlink to it, a hardlink to it,
+    or a file of its own for copy and kernel.
+    """
+    if mode == "symlink":
+        return os.path.islink(dst_path) and os.path.realpath(dst_path) == os.path.realpath(src_path)
+    if os.path.islink(dst_path):
+        return False
+    return os.path.samefile(src_path, dst_path) == (mode == "hardlink")
+
+
+def remove_published(dst_path) -> bool:
+    """ Removes a published file, a symlink whose source is gone included. Returns whether there was one """
+    if not (os.path.islink(dst_path) or os.path.isfile(dst_path)):
+        return False
+    os.remove(dst_path)
+    return True
+
+
+def copy_many(pairs, jobs=None, mode="copy"):
+    """
+    Publishes every (src, dst) pair with publish_file. Destination directories must already exist.
+    jobs=1 works in the calling thread, otherwise a ThreadPoolExecutor with that many workers is used
+    (None lets the executor pick). The first failing copy raises once all workers are done.
+    """
+    if jobs == 1 or len(pairs) < 2:
+        for src_path, dst_path in pairs:
+            publish_file(src_path, dst_path, mode)
+        return
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        # list() so that errors raised in the workers surface here
+        list(executor.map(lambda pair: publish_file(*pair, mode), pairs))
+
+
+def parallel_copy_files(src, dst, jobs=None, mode="copy") -> int:
+    """
+    Same result as copy_files: the tree is scanned once, every directory is created up front,
+    then the files are published on a pool of jobs threads. Returns the number of files copied.
+    """
+    if os.path.exists(dst):
+        shutil.rmtree(dst)
+    os.mkdir(dst)
+    dirs, files = scan_tree(src)
+    for rel in dirs:
+        os.mkdir(os.path.join(dst, rel))
+    pairs = [(os.path.join(src, rel), os.path.join(dst, rel)) for rel in files]
+    copy_many(pairs, jobs, mode)
+    return len(pairs)
+
+
+def sync_files(src, dst, manifest_path=DEFAULT_MANIFEST, jobs=None, mode="copy", changed=None) -> dict:
+    """
+    Incremental version of copy_files.
+    A file is copied when it is new, or when its size/mtime changed and its content hash differs from the manifest.
+    A file the manifest doesn't know about (first sync, lost manifest) is not copied when the output already
+    has the same content hash: an unchanged output keeps its mtime.
+    Outputs whose source disappeared since the last sync are removed. Files in dst that were never
+    published from src (e.g. generated pages) are left alone.
+    The copies themselves run on a pool of jobs threads with the given publish mode (see copy_many).
+    The manifest records the mode of every file: a file published with another mode is published again,
+    so that switching to copy never leaves links into src behind.
+    Returns the counts {"copied", "skipped", "removed"}. The relative paths copied or removed are added to
+    the changed list, if one is given.
+    """
+    old_manifest = load_manifest(manifest_path)
+    new_manifest = {}
+    stats = {"copied": 0, "skipped": 0, "removed": 0}
+    to_copy = []
+    os.makedirs(dst, exist_ok=True)
+
+    for rel, st in sorted(list_files(src).items()):
+        src_path = os.path.join(src, rel)
+        dst_path = os.path.join(dst, rel)
+        entry = old_manifest.get(rel)
+        if entry and entry.get("mode") != mode:
+            entry = None
+        published = os.path.isfile(dst_path) and os.path.getsize(dst_path) == st.st_size
+        if entry and published and entry["size"] == st.st_size and entry["mtime_ns"] == st.st_mtime_ns:
+            new_manifest[rel] = entry
+            stats["skipped"] += 1
+            continue
+        digest = file_hash(src_path)
+        if entry and published and entry["sha256"] == digest:
+            # only touched, the content is the same
+            stats["skipped"] += 1
+        elif not entry and published and published_with(src_path, dst_path, mode) and file_hash(dst_path) == digest:
+            stats["skipped"] += 1
+        else:
+            os.makedirs(os.path.dirname(dst_path), exist_ok=True)
+            to_copy.append((src_path, dst_path))
+            if changed is not None:
+                changed.append(rel)
+        new_manifest[rel] = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "sha256": digest, "mode": mode}
+
+    copy_many(to_copy, jobs, mode)
+    stats["copied"] = len(to_copy)
+
+    for rel in old_manifest:
+        if rel in new_manifest:
+            continue
+        dst_path = os.path.join(dst, rel)
+        if remove_published(dst_path):
+            stats["removed"] += 1
+            if changed is not None:
+                changed.append(rel)
+        remove_empty_dirs(os.path.dirname(dst_path), dst)
+
+    save_manifest(manifest_path, new_manifest)
+    return stats
+
+
+def remove_empty_dirs(directory, stop):
+    """ Removes directory and its parents while they are empty, never going above stop """
+    stop = os.path.abspath(stop)
+    directory = os.path.abspath(directory)
+    while directory != stop and directory.startswith(stop):
+        try:
+            os.rmdir(directory)
+        except OSError:
+            return
+        directory = os.path.dirname(directory)
@@ -0,0 +1,73 @@
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+from md_to_blocks import markdown_to_html_node, write_markdown_html, write_blocks_html, iter_mmap_blocks
+
+"""
+Peak Python memory and time to render one huge generated markdown page three ways:
+read() the whole file and markdown_to_html_node, stream its lines with write_markdown_html,
+or memory map it with iter_mmap_blocks. The largest block is printed for reference.
+    python3 src/bench_big_page.py --size 200
+"""
+
+def make_page(path, size_mb):
+    block = 0
+    written = 0
+    with open(path, "w", encoding="utf-8") as f:
+        while written < size_mb * 1024 * 1024:
+            if block % 4 == 0:
+                text = f"## Release {block}\n\n"
+            elif block % 4 == 1:
+                text = "\n".join(f"- fixed **issue** {block}.{i} in `module_{i}`" for i in range(20)) + "\n\n"
+            elif block % 4 == 2:
+                text = "```\n" + "\n".join(f"line {i} of the example" for i in range(15)) + "\n```\n\n"
+            else:
+                text = f"See [the notes](https://example.com/{block}) for *details* about release {block}.\n\n"
+            f.write(text)
+            written += len(text)
+            block += 1
+
+
+def whole(path, out):
+    with open(path, encoding="utf-8") as f:
+        out.write(markdown_to_html_node(f.read()).to_html())
+
+
+def streamed(path, out):
+    with open(path, encoding="utf-8") as f:
+        write_markdown_html(f, out)
+
+
+def mapped(path, out):
+    write_blocks_html(iter_mmap_blocks(path), out)
+
+
+def measure(fn, path):
+    with open(os.devnull, "w") as out:
+        tracemalloc.start()
+        start = time.perf_counter()
+        fn(path, out)
+        elapsed = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size", type=int, default=20, help="size of the page in MB")
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "changelog.md")
+        make_page(path, args.size)
+        largest = max(len(block) for block in iter_mmap_blocks(path))
+        print(f"page {os.path.getsize(path) / 1e6:.1f} MB, largest block {largest} characters")
+        for name, fn in (("read + to_html", whole), ("write_markdown_html", streamed), ("iter_mmap_blocks", mapped)):
+            elapsed, peak = measure(fn, path)
+            print(f"{name:<20} {elapsed:7.2f}s  peak {peak / 1e6:8.2f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+import argparse
+import random
+import re
+import time
+from md_to_blocks import block_to_block_type, BlockType
+
+"""
+Microbenchmark of block_to_block_type over a corpus with a realistic mix of block types,
+against the cascade of line checks it replaced.
+    python3 src/bench_blocks.py --blocks 200000
+"""
+
+def cascade_block_type(block):
+    """ block_to_block_type before the dispatch table, kept as the baseline """
+    lines = block.split("\n")
+    if re.search(r"(^#{1,6} )", block):
+        return BlockType.HEADING
+    if len(lines) > 1 and lines[0].startswith("```") and lines[-1].startswith("```"):
+        return BlockType.CODEBLOCK
+    if all(line.startswith('>') for line in lines):
+        return BlockType.QUOTEBLOCK
+    if all(line.startswith('- ') for line in lines):
+        return BlockType.ULIST
+    for i in range(len(lines)):
+        if not lines[i].startswith(f"{i + 1}."):
+            return BlockType.PARA
+    return BlockType.OLIST
+
+
+def make_corpus(n, seed=0):
+    """ Mostly paragraphs and lists, some headings, code and quotes, list lengths up to 60 items """
+    rng = random.Random(seed)
+    makers = [
+        (35, lambda: " ".join(["some words of a paragraph"] * rng.randint(1, 6)) + "\nand a second line"),
+        (20, lambda: "\n".join(f"- list item number {i}" for i in range(rng.randint(2, 60)))),
+        (10, lambda: "\n".join(f"{i}. ordered item" for i in range(1, rng.randint(2, 60)))),
+        (15, lambda: "#" * rng.randint(1, 3) + " A heading"),
+        (10, lambda: "```\n" + "\n".join(["code line"] * rng.randint(1, 30)) + "\n```"),
+        (10, lambda: "\n".join(["> quoted text"] * rng.randint(1, 8))),
+    ]
+    weights = [w for w, _ in makers]
+    return [rng.choices(makers, weights)[0][1]() for _ in range(n)]
+
+
+def timed(fn, corpus, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for block in corpus:
+            fn(block)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--blocks", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    corpus = make_corpus(args.blocks)
+    assert all(block_to_block_type(b) == cascade_block_type(b) for b in corpus)
+    old = timed(cascade_block_type, corpus, args.repeat)
+    new = timed(block_to_block_type, corpus, args.repeat)
+    print(f"{args.blocks} blocks, {sum(map(len, corpus)) / 1e6:.1f} MB")
+    print(f"cascade        {old:7.3f}s  {old / args.blocks * 1e6:6.2f} us/block")
+    print(f"dispatch table {new:7.3f}s  {new / args.blocks * 1e6:6.2f} us/block  x{old / new:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+import argparse
+import os
+import tempfile
+import time
+from assets import copy_files, parallel_copy_files, PUBLISH_MODES
+
+"""
+Compares the recursive copy_files against parallel_copy_files on a generated tree of small files,
+then every publish mode at the largest job count.
+    python3 src/bench_copy.py --files 20000 --jobs 1 4 16
+"""
+
+def make_tree(root, n_files, size, per_dir=100):
+    payload = os.urandom(size)
+    for i in range(n_files):
+        directory = os.path.join(root, f"dir{i // per_dir}", f"sub{i % 7}")
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, f"asset{i}.bin"), "wb") as f:
+            f.write(payload)
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--files", type=int, default=5000)
+    parser.add_argument("--size", type=int, default=4096, help="bytes per file")
+    parser.add_argument("--jobs", type=int, nargs="+", default=[1, 4, 8, 16])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        src = os.path.join(tmp, "static")
+        dst = os.path.join(tmp, "public")
+        make_tree(src, args.files, args.size)
+        print(f"{args.files} files of {args.size} bytes")
+        best = min(timed(copy_files, src, dst) for _ in range(args.repeat))
+        print(f"copy_files (recursive)      {best:8.3f}s")
+        for jobs in args.jobs:
+            t = min(timed(parallel_copy_files, src, dst, jobs) for _ in range(args.repeat))
+            print(f"parallel_copy_files jobs={jobs:<3} {t:8.3f}s  x{best / t:.2f}")
+        jobs = max(args.jobs)
+        for mode in PUBLISH_MODES:
+            t = min(timed(parallel_copy_files, src, dst, jobs, mode) for _ in range(args.repeat))
+            print(f"mode={mode:<8} jobs={jobs:<3}       {t:8.3f}s  x{best / t:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+import argparse
+import sys
+import time
+from html_node import *
+
+"""
+The iterative ParentNode.render_into against the recursive one it replaced, on chains of nested
+blockquotes/lists of growing depth and on a wide tree. The recursive baseline needs the recursion
+limit raised, the iterative renderer doesn't.
+    python3 src/bench_deep.py --depths 100 1000 10000 100000
+"""
+
+def recursive_render_into(node, buf):
+    """ ParentNode.render_into before the explicit stack, kept here as the baseline """
+    if not node.tag:
+        raise ValueError("All Parent Nodes must have at tag")
+    if not node.children:
+        raise ValueError("Must have children")
+    buf.append(f"<{node.tag}{node.props_to_html()}>")
+    for c in node.children:
+        if type(c) is LeafNode:
+            buf.append(c.to_html())
+        else:
+            recursive_render_into(c, buf)
+    buf.append(f"</{node.tag}>")
+
+
+def recursive_to_html(node):
+    buf = []
+    recursive_render_into(node, buf)
+    return "".join(buf)
+
+
+def nested(depth):
+    """ depth levels of alternating blockquotes and lists, with a bit of text at every level """
+    node = LeafNode(None, "the bottom")
+    for level in range(depth):
+        tag = "blockquote" if level % 2 else "li"
+        node = ParentNode(tag, [LeafNode("i", f"level {level}"), node])
+        if tag == "li":
+            node = ParentNode("ul", [node])
+    return ParentNode("div", [node])
+
+
+def wide(n_nodes):
+    return ParentNode("div", [ParentNode("p", [LeafNode(None, f"paragraph {i} "), LeafNode("b", "bold"),
+                                              LeafNode("a", "link", {"href": f"/{i}"})]) for i in range(n_nodes // 4)])
+
+
+def best(fn, node, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        html = fn(node)
+        times.append(time.perf_counter() - start)
+    return min(times), html
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--depths", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--nodes", type=int, default=100000, help="nodes of the wide tree")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), 3 * max(args.depths) + 100))
+
+    trees = [(f"depth {depth}", nested(depth)) for depth in args.depths] + [(f"wide {args.nodes}", wide(args.nodes))]
+    for name, tree in trees:
+        old, old_html = best(recursive_to_html, tree, args.repeat)
+        new, new_html = best(ParentNode.to_html, tree, args.repeat)
+        assert old_html == new_html
+        print(f"{name:<14} recursive {old:8.4f}s  explicit stack {new:8.4f}s  x{old / new:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+import argparse
+import random
+import time
+from md_to_text_node import *
+
+"""
+Inline parsing throughput in MB/s: the single sweep text_to_text_node against the five
+chained split_nodes_* passes it replaced.
+    python3 src/bench_inline.py --size 5000000
+"""
+
+def text_to_text_node_passes(text):
+    nodes = split_nodes_delimiter([TextNode(text, TextType.TEXT)], "**", TextType.BOLD)
+    nodes = split_nodes_delimiter(nodes, '*', TextType.ITALIC)
+    nodes = split_nodes_delimiter(nodes, '`', TextType.CODE)
+    nodes = split_nodes_image(nodes)
+    return split_nodes_link(nodes)
+
+
+def make_lines(size, seed=0):
+    """ Lines of prose with a realistic sprinkle of inline markup, about size characters in total """
+    rng = random.Random(seed)
+    words = ["the", "quick", "brown", "fox", "jumps", "over", "lazy", "dog", "static", "site", "generator"]
+    markup = ["**{}**", "*{}*", "`{}`", "[{}](https://example.com/{})", "![{}](/images/{}.png)"]
+    lines = []
+    total = 0
+    while total < size:
+        parts = []
+        for _ in range(rng.randint(5, 40)):
+            word = rng.choice(words)
+            if rng.random() < 0.15:
+                word = rng.choice(markup).format(word, word)
+            parts.append(word)
+        line = " ".join(parts)
+        lines.append(line)
+        total += len(line)
+    return lines, total
+
+
+def throughput(fn, lines, total, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for line in lines:
+            fn(line)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return total / best / 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size", type=int, default=2000000, help="characters of inline text")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    lines, total = make_lines(args.size)
+    assert all(text_to_text_node(line) == text_to_text_node_passes(line) for line in lines)
+    old = throughput(text_to_text_node_passes, lines, total, args.repeat)
+    new = throughput(text_to_text_node, lines, total, args.repeat)
+    print(f"{len(lines)} lines, {total / 1e6:.1f} MB")
+    print(f"chained passes {old:6.2f} MB/s")
+    print(f"single sweep   {new:6.2f} MB/s  x{new / old:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+import argparse
+import time
+from md_to_text_node import *
+
+"""
+Stress test for split_nodes_image/split_nodes_link on one paragraph with thousands of links or images.
+The old implementation rebuilt each markdown link and split the remaining text on it, which rescans
+and copies the rest of the paragraph for every match. Time per match should stay flat as the count grows.
+    python3 src/bench_links.py --counts 1000 2000 5000 10000
+"""
+
+def split_nodes_link_by_pattern(old_nodes):
+    """ split_nodes_link before it sliced at the match offsets, kept as the baseline """
+    new_nodes = []
+    for node in old_nodes:
+        if node.text_type is not TextType.TEXT:
+            new_nodes.append(node)
+            continue
+        current_text = node.text
+        for (alt, url) in extract_markdown_link(node.text):
+            before, after = current_text.split(f"[{alt}]({url})", 1)
+            if before:
+                new_nodes.append(TextNode(before, TextType.TEXT))
+            new_nodes.append(TextNode(alt, TextType.IMAGE, url))
+            current_text = after
+        if current_text != "":
+            new_nodes.append(TextNode(current_text, TextType.TEXT))
+    return new_nodes
+
+
+def paragraph(n_links):
+    return " and ".join(f"see [page number {i}](https://example.com/docs/section/{i}.html)" for i in range(n_links))
+
+
+def timed(fn, nodes, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(nodes)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--counts", type=int, nargs="+", default=[1000, 2000, 5000, 10000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    print(f"{'links':>7} {'by pattern':>12} {'us/link':>8} {'by offset':>12} {'us/link':>8}")
+    for n in args.counts:
+        nodes = [TextNode(paragraph(n), TextType.TEXT)]
+        old, old_nodes = timed(split_nodes_link_by_pattern, nodes, args.repeat)
+        new, new_nodes = timed(split_nodes_link, nodes, args.repeat)
+        assert old_nodes == new_nodes
+        print(f"{n:>7} {old:>11.4f}s {old / n * 1e6:>8.2f} {new:>11.4f}s {new / n * 1e6:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
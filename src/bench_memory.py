@@ -0,0 +1,64 @@
+import argparse
+import tracemalloc
+from html_node import LeafNode, ParentNode
+from textnode import TextNode, TextType
+
+"""
+Bytes per node of TextNode, LeafNode and ParentNode, compared with the same classes without __slots__
+(what they were before). The node content is shared so only the node objects themselves are measured.
+    python3 src/bench_memory.py --nodes 1000000
+"""
+
+class DictHTMLNode:
+    def __init__(self, tag=None, value=None, children=None, props=None):
+        self.tag = tag
+        self.value = value
+        self.children = children
+        self.props = props
+
+
+class DictLeafNode(DictHTMLNode):
+    def __init__(self, tag, value, props=None):
+        super().__init__(tag, value, None, props)
+
+
+class DictParentNode(DictHTMLNode):
+    def __init__(self, tag, children, props=None):
+        super().__init__(tag, None, children, props)
+
+
+class DictTextNode:
+    def __init__(self, text, text_type, url=None):
+        self.text = text
+        self.text_type = text_type
+        self.url = url
+
+
+def bytes_per_node(make, n):
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    nodes = [make() for _ in range(n)]
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    # the list holding them is not part of the node cost
+    return (used - nodes.__sizeof__()) / n
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--nodes", type=int, default=200000)
+    args = parser.parse_args()
+    children = [LeafNode("b", "x")]
+    cases = [
+        ("TextNode", lambda: DictTextNode("text", TextType.TEXT), lambda: TextNode("text", TextType.TEXT)),
+        ("LeafNode", lambda: DictLeafNode("b", "text"), lambda: LeafNode("b", "text")),
+        ("ParentNode", lambda: DictParentNode("p", children), lambda: ParentNode("p", children)),
+    ]
+    for name, old, new in cases:
+        before = bytes_per_node(old, args.nodes)
+        after = bytes_per_node(new, args.nodes)
+        print(f"{name:<11} before {before:6.1f} B/node  after {after:6.1f} B/node")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+import argparse
+import os
+import tempfile
+import time
+from bench_big_page import make_page
+from md_to_blocks import markdown_to_html_node
+
+"""
+Scaling of markdown_to_html_node(jobs=...) on one huge generated page (see bench_big_page.make_page),
+pool startup included. Every run is checked to give the same html as the serial one.
+    python3 src/bench_parallel_page.py --size 50 --workers 1 2 4 8
+"""
+
+def render(doc, jobs):
+    start = time.perf_counter()
+    html = markdown_to_html_node(doc, jobs=jobs).to_html()
+    return html, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size", type=int, default=20, help="size of the page in MB")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "changelog.md")
+        make_page(path, args.size)
+        with open(path, encoding="utf-8") as f:
+            doc = f.read()
+    print(f"{len(doc) / 1e6:.1f} MB page, {os.cpu_count()} cpus")
+    expected, serial = render(doc, 1)
+    for jobs in args.workers:
+        html, elapsed = (expected, serial) if jobs == 1 else render(doc, jobs)
+        assert html == expected, f"{jobs} workers changed the html"
+        print(f"{jobs:2d} workers {elapsed:7.2f}s  x{serial / elapsed:.2f}")
+
+
+if __name__ == "__main__":
+    main()
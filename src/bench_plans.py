@@ -0,0 +1,69 @@
+import argparse
+import time
+from corpus import MIXES, generate_corpus
+from html_node import LeafNode, ParentNode
+from md_to_blocks import markdown_to_html_node
+from render_plan import Slot, compile_plan
+
+"""
+Repeat renders of the same parsed pages: to_html on the tree every time, against a RenderPlan
+compiled once. The pages are also wrapped in a layout with title and content slots, the way a
+preview server would reuse one layout for every page.
+    python3 src/bench_plans.py --pages 200 --renders 20
+"""
+
+def layout():
+    return ParentNode("html", [
+        ParentNode("head", [ParentNode("title", [Slot("title")]), LeafNode("link", "-", {"rel": "stylesheet", "href": "/index.css"})]),
+        ParentNode("body", [
+            ParentNode("nav", [LeafNode("a", name, {"href": f"/{name}/"}) for name in ("blog", "about", "contact")]),
+            Slot("content"),
+        ]),
+    ])
+
+
+def timed(fn, renders):
+    start = time.perf_counter()
+    for _ in range(renders):
+        fn()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, default=100)
+    parser.add_argument("--blocks", type=int, default=50, help="blocks per page")
+    parser.add_argument("--mix", choices=sorted(MIXES), default="balanced")
+    parser.add_argument("--renders", type=int, default=20, help="times every page is rendered")
+    args = parser.parse_args()
+
+    trees = [markdown_to_html_node(doc) for doc in generate_corpus(args.pages, args.blocks, args.mix).values()]
+    start = time.perf_counter()
+    plans = [compile_plan(tree) for tree in trees]
+    compile_time = time.perf_counter() - start
+    assert [plan.render() for plan in plans] == [tree.to_html() for tree in trees]
+    tree_time = timed(lambda: [tree.to_html() for tree in trees], args.renders)
+    plan_time = timed(lambda: [plan.render() for plan in plans], args.renders)
+    print(f"{args.pages} pages rendered {args.renders} times, compiling the plans took {compile_time:.4f}s")
+    print(f"to_html          {tree_time:8.4f}s")
+    print(f"plan.render      {plan_time:8.4f}s  x{tree_time / plan_time:.0f}")
+
+    page = layout()
+    page_plan = compile_plan(page)
+    # the layout around every page: rebuilding the tree with the page in it, or filling the plan's slots
+    def tree_layout():
+        for i, plan in enumerate(plans):
+            page.children[0].children[0].children = [LeafNode(None, f"Page {i}")]
+            page.children[1].children[1] = LeafNode(None, plan.render())
+            page.to_html()
+    def plan_layout():
+        for i, plan in enumerate(plans):
+            page_plan.render(title=f"Page {i}", content=plan.render())
+    tree_time = timed(tree_layout, args.renders)
+    plan_time = timed(plan_layout, args.renders)
+    print(f"layout to_html   {tree_time:8.4f}s")
+    print(f"layout plan      {plan_time:8.4f}s  x{tree_time / plan_time:.1f}")
+
+
+if __name__ == "__main__":
+    main()
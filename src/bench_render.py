@@ -0,0 +1,87 @@
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+from html_node import *
+
+"""
+Times ParentNode.to_html on large trees against the old implementation that concatenated
+the children's html with += at every level, then compares the peak memory of writing
+to_html() to a file against streaming it with write_html.
+    python3 src/bench_render.py --nodes 100000 --depth 500
+"""
+
+def concat_to_html(node):
+    """ ParentNode.to_html before render_into, kept here as the baseline """
+    if isinstance(node, LeafNode):
+        return node.to_html()
+    res = ""
+    for c in node.children:
+        res += concat_to_html(c)
+    return f"<{node.tag}{node.props_to_html()}>{res}</{node.tag}>"
+
+
+def wide_tree(n_nodes):
+    """ A document of paragraphs with a handful of inline children each, about n_nodes nodes """
+    paragraphs = []
+    for i in range(n_nodes // 5):
+        paragraphs.append(ParentNode("p", [
+            LeafNode(None, f"paragraph {i} with "),
+            LeafNode("b", "bold"),
+            LeafNode("a", "a link", {"href": f"/page/{i}"}),
+        ]))
+    return ParentNode("div", paragraphs)
+
+
+def deep_tree(n_nodes, depth):
+    """ Nested blockquotes depth levels deep, each level carrying some text, repeated up to about n_nodes nodes """
+    chains = []
+    for _ in range(max(1, n_nodes // (2 * depth))):
+        node = LeafNode(None, "the bottom")
+        for level in range(depth):
+            node = ParentNode("blockquote", [LeafNode("i", f"level {level} " * 4), node])
+        chains.append(node)
+    return ParentNode("div", chains)
+
+
+def timed(fn, node, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        html = fn(node)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, html
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--nodes", type=int, default=100000)
+    parser.add_argument("--depth", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), 4 * args.depth + 100))
+
+    for name, tree in (("wide", wide_tree(args.nodes)), (f"deep ({args.depth})", deep_tree(args.nodes, args.depth))):
+        old, old_html = timed(concat_to_html, tree, args.repeat)
+        new, new_html = timed(ParentNode.to_html, tree, args.repeat)
+        assert old_html == new_html
+        print(f"{name:<12} {len(new_html) / 1e6:6.1f} MB  concat {old:7.3f}s  render_into {new:7.3f}s  x{old / new:.2f}")
+        del old_html, new_html
+        with open(os.devnull, "w") as devnull:
+            whole = peak_memory(lambda: devnull.write(tree.to_html()))
+            streamed = peak_memory(lambda: tree.write_html(devnull))
+        print(f"{'':<12} peak memory  to_html+write {whole / 1e6:6.1f} MB  write_html {streamed / 1e6:6.1f} MB")
+
+
+def peak_memory(fn):
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+
+if __name__ == "__main__":
+    main()
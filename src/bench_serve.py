@@ -0,0 +1,108 @@
+import argparse
+import http.client
+import multiprocessing
+import os
+import statistics
+import tempfile
+import threading
+import time
+from corpus import MIXES, generate_corpus, write_corpus, write_assets
+from serve import make_server
+
+"""
+Latency of the dev server under a local load generator. The server runs in its own process,
+clients are threads with one keep-alive connection each. Four rounds over a generated site:
+    cold         first request of every page, rendered
+    warm         every page again, served from the page cache
+    revalidate   with If-None-Match, answered 304
+    static       files of static/
+    python3 src/bench_serve.py --pages 200 --clients 8 --requests 2000
+"""
+
+def run_server(static_dir, content_dir, ports):
+    server = make_server(static_dir, content_dir, port=0)
+    ports.put(server.server_address[1])
+    server.serve_forever()
+
+
+def load(port, paths, clients, etags=None):
+    """ Requests every path once, spread over clients connections. Returns the latencies and {path: etag} """
+    latencies = []
+    seen = {}
+    lock = threading.Lock()
+
+    def client(share):
+        conn = http.client.HTTPConnection("127.0.0.1", port)
+        mine = []
+        for path in share:
+            headers = {"If-None-Match": etags[path]} if etags else {}
+            start = time.perf_counter()
+            conn.request("GET", path, headers=headers)
+            response = conn.getresponse()
+            response.read()
+            mine.append(time.perf_counter() - start)
+            assert response.status in (200, 304), f"{path}: {response.status}"
+            with lock:
+                seen[path] = response.getheader("ETag")
+        conn.close()
+        with lock:
+            latencies.extend(mine)
+
+    threads = [threading.Thread(target=client, args=(paths[i::clients],)) for i in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, seen
+
+
+def report(name, latencies, seconds):
+    latencies = sorted(latencies)
+    p50 = statistics.median(latencies)
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    print(f"{name:<11} {len(latencies):6d} requests  p50 {p50 * 1000:7.2f} ms  p99 {p99 * 1000:7.2f} ms  "
+          f"{len(latencies) / seconds:8.0f} req/s")
+
+
+def timed_load(name, port, paths, clients, etags=None):
+    start = time.perf_counter()
+    latencies, seen = load(port, paths, clients, etags)
+    report(name, latencies, time.perf_counter() - start)
+    return seen
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, default=100)
+    parser.add_argument("--blocks", type=int, default=50, help="blocks per page")
+    parser.add_argument("--mix", choices=sorted(MIXES), default="balanced")
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=2000, help="requests of the warm, revalidate and static rounds")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        static_dir = os.path.join(tmp, "static")
+        content_dir = os.path.join(tmp, "content")
+        corpus = generate_corpus(args.pages, args.blocks, args.mix)
+        write_corpus(content_dir, corpus)
+        write_assets(static_dir, 100)
+        ports = multiprocessing.Queue()
+        server = multiprocessing.Process(target=run_server, args=(static_dir, content_dir, ports), daemon=True)
+        server.start()
+        port = ports.get()
+        try:
+            pages = ["/" + rel[:-len(".md")] + ".html" for rel in corpus]
+            repeated = [pages[i % len(pages)] for i in range(args.requests)]
+            assets = [f"/assets{i % 8}/img{i % 3}/file{i}.bin" for i in (n % 100 for n in range(args.requests))]
+            print(f"{args.pages} pages ({args.mix}), {args.clients} clients")
+            etags = timed_load("cold", port, pages, args.clients)
+            timed_load("warm", port, repeated, args.clients)
+            timed_load("revalidate", port, repeated, args.clients, etags)
+            timed_load("static", port, assets, args.clients)
+        finally:
+            server.terminate()
+            server.join()
+
+
+if __name__ == "__main__":
+    main()
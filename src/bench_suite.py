@@ -0,0 +1,116 @@
+import argparse
+import datetime
+import hashlib
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from assets import copy_files, load_json, save_json
+from corpus import MIXES, generate_corpus, inline_texts, write_assets
+from md_to_blocks import markdown_to_html_node
+from md_to_text_node import text_to_text_node
+
+"""
+Times the main stages of a build on a synthetic corpus (see corpus.py): text_to_text_node on every
+inline line, markdown_to_html_node on every page, to_html on the parsed pages and copy_files on a
+generated static tree. Results can be saved as JSON and compared with an earlier run, a stage slower
+than the old one by more than --threshold is reported as a regression and the exit status is 1.
+    python3 src/bench_suite.py --pages 200 --mix balanced --save .cache/bench/before.json
+    python3 src/bench_suite.py --pages 200 --mix balanced --compare .cache/bench/before.json
+"""
+
+def measure(fn, repeat):
+    """ Runs fn repeat times, returns the best and the median time """
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times), statistics.median(times)
+
+
+def run_suite(corpus, assets_dir, repeat) -> dict:
+    """ {benchmark: {"seconds" (best), "median", "bytes"}} for every stage """
+    docs = list(corpus.values())
+    texts = inline_texts(corpus)
+    nodes = [markdown_to_html_node(doc) for doc in docs]
+    html_bytes = sum(len(node.to_html()) for node in nodes)
+    asset_bytes = sum(os.path.getsize(os.path.join(d, f)) for d, _, files in os.walk(assets_dir) for f in files)
+    dst = assets_dir + "_copy"
+    benchmarks = {
+        "text_to_text_node": (lambda: [text_to_text_node(text) for text in texts], sum(map(len, texts))),
+        "markdown_to_html_node": (lambda: [markdown_to_html_node(doc) for doc in docs], sum(map(len, docs))),
+        "to_html": (lambda: [node.to_html() for node in nodes], html_bytes),
+        "copy_files": (lambda: copy_files(assets_dir, dst), asset_bytes),
+    }
+    results = {}
+    for name, (fn, nbytes) in benchmarks.items():
+        best, median = measure(fn, repeat)
+        results[name] = {"seconds": best, "median": median, "bytes": nbytes}
+    return results
+
+
+def compare(old, new, threshold) -> list:
+    """ Prints new against old stage by stage, returns the names of the stages that got slower than threshold """
+    regressions = []
+    if old.get("corpus") != new["corpus"]:
+        print("warning: the corpora differ, the numbers are not comparable")
+    for name, stats in new["results"].items():
+        before = old.get("results", {}).get(name)
+        if before is None:
+            continue
+        ratio = stats["seconds"] / before["seconds"]
+        slower = ratio > 1 + threshold
+        if slower:
+            regressions.append(name)
+        print(f"{name:<22} {before['seconds']:8.4f}s -> {stats['seconds']:8.4f}s  x{ratio:.2f}"
+              f"{'  REGRESSION' if slower else ''}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, default=100)
+    parser.add_argument("--blocks", type=int, default=50, help="blocks per page")
+    parser.add_argument("--mix", choices=sorted(MIXES), default="balanced")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--assets", type=int, default=1000, help="number of static files for copy_files")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--save", default=None, help="write the results to this json file")
+    parser.add_argument("--compare", default=None, help="json results of an earlier run to compare with")
+    parser.add_argument("--threshold", type=float, default=0.10, help="slowdown reported as a regression, 0.10 is 10%%")
+    args = parser.parse_args()
+
+    corpus = generate_corpus(args.pages, args.blocks, args.mix, args.seed)
+    digest = hashlib.sha256("".join(corpus.values()).encode()).hexdigest()
+    with tempfile.TemporaryDirectory() as tmp:
+        assets_dir = os.path.join(tmp, "static")
+        write_assets(assets_dir, args.assets, seed=args.seed)
+        results = run_suite(corpus, assets_dir, args.repeat)
+    run = {
+        "date": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        # the same settings give the same corpus, and so the same digest
+        "corpus": {"pages": args.pages, "blocks": args.blocks, "mix": args.mix, "seed": args.seed,
+                   "assets": args.assets, "sha256": digest},
+        "results": results,
+    }
+    print(f"{args.pages} pages x {args.blocks} blocks ({args.mix}), {args.assets} assets, best of {args.repeat}")
+    for name, stats in results.items():
+        rate = stats["bytes"] / stats["seconds"] / 1e6
+        print(f"{name:<22} {stats['seconds']:8.4f}s  median {stats['median']:8.4f}s  {rate:8.1f} MB/s")
+    if args.save:
+        save_json(args.save, run)
+    if args.compare:
+        old = load_json(args.compare)
+        if not old:
+            sys.exit(f"no results in {args.compare}")
+        if compare(old, run, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,404 @@
+import asyncio
+import filecmp
+import hashlib
+import io
+import math
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from assets import scan_tree, file_hash, load_manifest, save_manifest, remove_empty_dirs
+from md_to_blocks import write_markdown_html, write_blocks_html, iter_mmap_blocks
+from inline_cache import worker_cache
+from output import write_outputs, write_file, untouched, output_entry, temp_path, DEFAULT_CONCURRENCY
+import html_node
+import inline_cache
+import profiling
+import md_to_blocks
+import md_to_text_node
+import textnode
+
+"""
+Turns every markdown page of the content directory into an html page in public/.
+content/blog/post.md is written to public/blog/post.html.
+Pages are independent, so they are rendered in chunks on a pool of processes. Each worker writes
+the pages it rendered itself, through the output stage (see output.py), only stats travel back to the parent.
+With a build cache, a page is only rendered again when its source, the parser code or the template changed,
+and a rendered page is only written when its html hashes differently from what the last build wrote.
+"""
+
+CONTENT_MARKER = "{{ Content }}"
+TITLE_MARKER = "{{ Title }}"
+DEFAULT_CACHE = os.path.join(".cache", "build_cache.json")
+# sources at least this big are memory mapped instead of read line by line
+MMAP_THRESHOLD = 8 * 1024 * 1024
+# every module the html of a page depends on, this one included for the template handling
+PARSER_MODULES = (md_to_blocks, md_to_text_node, textnode, html_node, inline_cache, sys.modules[__name__])
+
+
+def find_pages(content_dir) -> list:
+    """ Relative paths of the markdown files under content_dir, sorted so that builds are deterministic """
+    if not os.path.isdir(content_dir):
+        return []
+    return sorted(rel for rel in scan_tree(content_dir)[1] if rel.endswith(".md"))
+
+
+def output_path(rel) -> str:
+    return rel[:-len(".md")] + ".html"
+
+
+def extract_title(doc) -> str:
+    """ The text of the first "# " heading, empty if the page has none. doc is a string or an iterable of lines """
+    if isinstance(doc, str):
+        doc = doc.split("\n")
+    for line in doc:
+        if line.startswith("# "):
+            return line[2:].strip()
+    return ""
+
+
+def load_template(path):
+    """ Returns (before, after): the template split around {{ Content }}, or None without a template """
+    if path is None:
+        return None
+    with open(path, encoding="utf-8") as f:
+        template = f.read()
+    if CONTENT_MARKER not in template:
+        raise ValueError(f"{path} has no {CONTENT_MARKER}")
+    before, after = template.split(CONTENT_MARKER, 1)
+    return before, after
+
+
+def stream_page(src_path, f, template=None, inline_cache=None):
+    """
+    Renders the markdown file src_path into the text file f, inside the template if there is one.
+    The page is streamed block by block (see write_markdown_html), big sources through a memory map
+    (see iter_mmap_blocks). The source is read a first time for the title when there is a template.
+    """
+    use_mmap = os.path.getsize(src_path) >= MMAP_THRESHOLD
+    with open(src_path, encoding="utf-8") as src:
+        title = ""
+        if template:
+            title = extract_title(src)
+            src.seek(0)
+            f.write(template[0].replace(TITLE_MARKER, title))
+        if use_mmap:
+            write_blocks_html(iter_mmap_blocks(src_path), f, inline_cache)
+        else:
+            write_markdown_html(src, f, inline_cache)
+        if template:
+            f.write(template[1].replace(TITLE_MARKER, title))
+
+
+def render_page(src_path, template=None, inline_cache=None) -> bytes:
+    """ The html of the markdown file src_path, inside the template if there is one, utf-8 encoded """
+    buf = io.StringIO()
+    stream_page(src_path, buf, template, inline_cache)
+    return buf.getvalue().encode("utf-8")
+
+
+def write_streamed_page(src_path, dst_path, template=None, inline_cache=None, known=None) -> tuple:
+    """
+    Streams the page of src_path into a temporary file, for sources too big to be rendered in memory.
+    The file replaces dst_path by a rename, unless dst_path already holds the same page and it is dropped:
+    like output.write_file, known (the entry of the last write) is trusted while dst_path is untouched,
+    otherwise the files are compared. Returns (size of the page, whether it wrote, the entry of dst_path).
+    """
+    os.makedirs(os.path.dirname(dst_path) or ".", exist_ok=True)
+    tmp = temp_path(dst_path)
+    try:
+        with open(tmp, "w", encoding="utf-8") as f:
+            stream_page(src_path, f, template, inline_cache)
+        size = os.path.getsize(tmp)
+        digest = file_hash(tmp)
+        if untouched(dst_path, known):
+            same = known["sha256"] == digest
+        else:
+            same = os.path.isfile(dst_path) and filecmp.cmp(tmp, dst_path, shallow=False)
+        if same:
+            os.remove(tmp)
+            return size, False, output_entry(dst_path, digest)
+        os.replace(tmp, dst_path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    return size, True, output_entry(dst_path, digest)
+
+
+def write_page(src_path, dst_path, template=None, inline_cache=None) -> dict:
+    """
+    Renders the markdown file src_path into dst_path, replaced by a rename once the page is complete and
+    left alone when it already holds the same page (see output.write_file).
+    Sources of MMAP_THRESHOLD or more are streamed (see write_streamed_page).
+    Returns the entry of dst_path (see output.output_entry).
+    """
+    if os.path.getsize(src_path) >= MMAP_THRESHOLD:
+        return write_streamed_page(src_path, dst_path, template, inline_cache)[2]
+    return write_file(dst_path, render_page(src_path, template, inline_cache))[1]
+
+
+def render_chunk(content_dir, dst_dir, rels, template=None, inline_cache_bytes=None, profile=False,
+                 write_concurrency=DEFAULT_CONCURRENCY, known=None) -> dict:
+    """
+    Worker side: renders and writes a chunk of pages, returns the timing for it.
+    Pages are handed to output.write_outputs as they are rendered, its stats are sent back under "output",
+    with "entries" and "changed" keyed by output path (see output_path).
+    Sources of MMAP_THRESHOLD or more are too big to be held in memory, write_streamed_page streams them to disk.
+    known is {output path: entry} of the pages written by the last build, see output.write_file.
+    With inline_cache_bytes, inline parsing goes through an InlineCache of that size kept by the process.
+    With profile, the stage timings of the process are sent back under "profile" (see profiling.Profiler.take).
+    """
+    start = time.perf_counter()
+    cache = worker_cache(inline_cache_bytes)
+    if cache is not None:
+        before = cache.stats()
+    profiler = profiling.enable() if profile else None
+    known = known or {}
+    written = 0
+    # {path in dst_dir: output path}
+    outs = {os.path.join(dst_dir, output_path(rel)): output_path(rel) for rel in rels}
+    # pages streamed to disk, they don't go through write_outputs
+    streamed = {"files": 0, "written": 0, "unchanged": 0, "bytes": 0, "entries": {}, "changed": []}
+
+    def outputs():
+        nonlocal written
+        for rel in rels:
+            src_path = os.path.join(content_dir, rel)
+            out = output_path(rel)
+            dst_path = os.path.join(dst_dir, out)
+            stream = os.path.getsize(src_path) >= MMAP_THRESHOLD
+            if stream:
+                fn, args, size = write_streamed_page, (src_path, dst_path, template, cache, known.get(out)), lambda r: r[0]
+            else:
+                fn, args, size = render_page, (src_path, template, cache), len
+            try:
+                if profiler is not None:
+                    page = profiler.measure_page(rel, fn, *args, size=size)
+                else:
+                    page = fn(*args)
+            except Exception as e:
+                raise Exception(f"{rel}: {e}") from e
+            written += size(page)
+            if not stream:
+                yield dst_path, page
+                continue
+            nbytes, wrote, streamed["entries"][out] = page
+            streamed["files"] += 1
+            if wrote:
+                streamed["written"] += 1
+                streamed["bytes"] += nbytes
+                streamed["changed"].append(out)
+            else:
+                streamed["unchanged"] += 1
+
+    known_paths = {path: known[out] for path, out in outs.items() if out in known}
+    output = asyncio.run(write_outputs(outputs(), write_concurrency, known_paths))
+    output["entries"] = {outs[path]: entry for path, entry in output["entries"].items()}
+    output["changed"] = [outs[path] for path in output["changed"]]
+    for key, value in streamed.items():
+        if key == "entries":
+            output[key].update(value)
+        else:
+            output[key] += value
+    result = {"pid": os.getpid(), "pages": len(rels), "bytes": written, "seconds": time.perf_counter() - start,
+              "output": output}
+    if profiler is not None:
+        result["profile"] = profiler.take()
+    if cache is not None:
+        after = cache.stats()
+        for key in ("hits", "misses", "evictions"):
+            result[f"inline_{key}"] = after[key] - before[key]
+    return result
+
+
+def build_stamp(template_path=None) -> str:
+    """
+    Hash of everything pages share: the source of the parser modules and the template.
+    A cache written with another stamp is thrown away.
+    """
+    h = hashlib.sha256()
+    for module in PARSER_MODULES:
+        with open(module.__file__, "rb") as f:
+            h.update(f.read())
+    if template_path is not None:
+        h.update(file_hash(template_path).encode())
+    return h.hexdigest()
+
+
+def plan_pages(content_dir, dst_dir, pages, cached) -> tuple:
+    """
+    Splits pages into the ones to render and the ones whose output is still good, given the
+    cache entries {relative path: {"size", "mtime_ns", "sha256"}} of the last build.
+    Like sync_files, the content hash is only computed when size or mtime changed.
+    Returns (stale pages, cache entries for every page).
+    """
+    stale = []
+    entries = {}
+    for rel in pages:
+        st = os.stat(os.path.join(content_dir, rel))
+        entry = cached.get(rel)
+        fresh = entry is not None and os.path.isfile(os.path.join(dst_dir, output_path(rel)))
+        if fresh and entry["size"] == st.st_size and entry["mtime_ns"] == st.st_mtime_ns:
+            entries[rel] = entry
+            continue
+        digest = file_hash(os.path.join(content_dir, rel))
+        if not (fresh and entry["sha256"] == digest):
+            stale.append(rel)
+        entries[rel] = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "sha256": digest}
+    return stale, entries
+
+
+def record_pages(cache_path, template_path, written, removed):
+    """
+    Updates the build cache with pages rendered outside of build_pages (see watch.apply_changes), so that the
+    next build knows about them: written is {page: (entry of its source, entry of its output)}, removed the
+    pages whose source is gone. Source entries are only recorded when the cache was written for the same
+    parser and template, otherwise the next build renders every page anyway.
+    """
+    cache = load_manifest(cache_path)
+    pages = cache.get("pages", {})
+    outputs = cache.get("outputs", {})
+    same_stamp = cache.get("stamp") == build_stamp(template_path)
+    for rel, (source, output) in written.items():
+        if same_stamp:
+            pages[rel] = source
+        outputs[output_path(rel)] = output
+    for rel in removed:
+        pages.pop(rel, None)
+        outputs.pop(output_path(rel), None)
+    save_manifest(cache_path, {"stamp": cache.get("stamp"), "pages": pages, "outputs": outputs})
+
+
+def remove_pages(dst_dir, rels) -> int:
+    """ Deletes the outputs of pages whose source is gone. Returns how many were removed """
+    removed = 0
+    for rel in rels:
+        dst_path = os.path.join(dst_dir, output_path(rel))
+        if os.path.isfile(dst_path):
+            os.remove(dst_path)
+            removed += 1
+        remove_empty_dirs(os.path.dirname(dst_path), dst_dir)
+    return removed
+
+
+def chunked(items, size):
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def build_pages(content_dir, dst_dir, jobs=None, chunk_size=None, template_path=None, cache_path=None,
+                inline_cache_bytes=None, profile=False, write_concurrency=DEFAULT_CONCURRENCY) -> dict:
+    """
+    Renders every page of content_dir into dst_dir.
+    With a cache_path, pages that didn't change since the last build (see build_stamp and plan_pages)
+    are skipped and the outputs of deleted pages are removed.
+    jobs is the number of worker processes (default: one per cpu, 1 renders in this process).
+    chunk_size is how many pages are sent to a worker at once, by default enough for about
+    four chunks per worker so that a slow chunk doesn't hold the whole build.
+    inline_cache_bytes turns on inline memoization (see render_chunk), each worker gets a cache that big.
+    profile records the time of each stage and page (see profiling). The numbers of the workers are merged
+    into the Profiler of this process, which is turned on for the build unless it already was.
+    write_concurrency is how many pages each worker writes at once (see output.write_outputs).
+    The cache also keeps the entry (size, mtime, sha256) of every page written, whatever the stamp, so that a
+    page rendered again to the same html is not written again (see output.write_file).
+    Returns a report with the page counts, the wall time, the stats of each worker, the output stats summed
+    over the workers under "output", the output paths that were written or removed under "changed" (for
+    deploy tools), and with profile the profiling.Profiler data under "profile".
+    """
+    start = time.perf_counter()
+    profiler = None
+    if profile:
+        was_profiling = profiling.active is not None
+        profiler = profiling.enable()
+    pages = find_pages(content_dir)
+    template = load_template(template_path)
+    to_render = pages
+    known = {}
+    if cache_path is not None:
+        stamp = build_stamp(template_path)
+        cache = load_manifest(cache_path)
+        cached = cache.get("pages", {}) if cache.get("stamp") == stamp else {}
+        to_render, entries = plan_pages(content_dir, dst_dir, pages, cached)
+        # what is in dst_dir doesn't depend on the stamp
+        known = {out: entry for out, entry in cache.get("outputs", {}).items() if isinstance(entry, dict)}
+    jobs = jobs or os.cpu_count() or 1
+    if chunk_size is None:
+        chunk_size = max(1, math.ceil(len(to_render) / (jobs * 4)))
+    chunks = chunked(to_render, chunk_size)
+
+    def chunk_args(chunk):
+        chunk_known = {output_path(rel): known[output_path(rel)] for rel in chunk if output_path(rel) in known}
+        return content_dir, dst_dir, chunk, template, inline_cache_bytes, profile, write_concurrency, chunk_known
+
+    if jobs == 1 or len(chunks) < 2:
+        results = [render_chunk(*chunk_args(chunk)) for chunk in chunks]
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            futures = [executor.submit(render_chunk, *chunk_args(chunk)) for chunk in chunks]
+            results = [future.result() for future in futures]
+
+    workers = {}
+    output = {"files": 0, "written": 0, "unchanged": 0, "bytes": 0, "seconds": 0.0, "waited": 0.0}
+    written = dict(known)
+    changed = []
+    for result in results:
+        stats = workers.setdefault(result["pid"], {"chunks": 0, "pages": 0, "bytes": 0, "seconds": 0.0})
+        stats["chunks"] += 1
+        stats["pages"] += result["pages"]
+        stats["bytes"] += result["bytes"]
+        stats["seconds"] += result["seconds"]
+        for key in ("inline_hits", "inline_misses", "inline_evictions"):
+            if key in result:
+                stats[key] = stats.get(key, 0) + result[key]
+        for key in output:
+            output[key] += result["output"][key]
+        written.update(result["output"]["entries"])
+        changed += result["output"]["changed"]
+        if profiler is not None:
+            profiler.merge(result["profile"])
+    removed = 0
+    if cache_path is not None:
+        gone = [rel for rel in cache.get("pages", {}) if rel not in entries]
+        changed += [output_path(rel) for rel in gone if os.path.isfile(os.path.join(dst_dir, output_path(rel)))]
+        removed = remove_pages(dst_dir, gone)
+        outputs = {output_path(rel): written[output_path(rel)] for rel in pages if output_path(rel) in written}
+        # saved only once every stale page was written
+        save_manifest(cache_path, {"stamp": stamp, "pages": entries, "outputs": outputs})
+    report = {
+        "pages": len(pages),
+        "rendered": len(to_render),
+        "skipped": len(pages) - len(to_render),
+        "removed": removed,
+        "chunks": len(chunks),
+        "seconds": time.perf_counter() - start,
+        # numbered in the order the workers first show up, pids mean nothing across builds
+        "workers": list(workers.values()),
+        # seconds is summed over the chunks, the workers write at the same time
+        "output": output,
+        "changed": sorted(changed),
+    }
+    if profiler is not None:
+        report["profile"] = profiler.to_dict()
+        if not was_profiling:
+            profiling.disable()
+    return report
+
+
+def format_report(report) -> str:
+    lines = [f"pages: {report['rendered']} rendered, {report['skipped']} skipped, {report['removed']} removed "
+             f"in {report['seconds']:.3f}s ({report['chunks']} chunks)"]
+    for i, stats in enumerate(report["workers"]):
+        rate = stats["pages"] / stats["seconds"] if stats["seconds"] else 0.0
+        lines.append(f"  worker {i}: {stats['pages']} pages in {stats['chunks']} chunks, "
+                     f"{stats['bytes']} bytes, {stats['seconds']:.3f}s busy, {rate:.0f} pages/s")
+        if "inline_hits" in stats:
+            lines.append(f"    inline cache: {stats['inline_hits']} hits, {stats['inline_misses']} misses, "
+                         f"{stats['inline_evictions']} evictions")
+    output = report["output"]
+    if output["files"]:
+        rate = output["files"] / output["seconds"] if output["seconds"] else 0.0
+        mb_rate = output["bytes"] / output["seconds"] / 1e6 if output["seconds"] else 0.0
+        lines.append(f"  output: {output['written']} written, {output['unchanged']} unchanged, {output['bytes']} bytes "
+                     f"in {output['seconds']:.3f}s, {rate:.0f} files/s, {mb_rate:.1f} MB/s, "
+                     f"rendering waited {output['waited']:.3f}s")
+    return "\n".join(lines)
@@ -0,0 +1,123 @@
+import os
+import random
+
+"""
+Reproducible synthetic markdown for benchmarks: the same seed and sizes always give the same pages.
+A mix weighs the kinds of blocks a page is made of (see MIXES), e.g. {"inline": 3, "code": 1}.
+Everything generated is valid for our parser: delimiters are balanced and links are well formed.
+"""
+
+WORDS = ("the", "site", "generator", "renders", "markdown", "into", "html", "pages", "with", "blocks",
+         "lists", "quick", "static", "content", "template", "parser", "node", "inline", "fast", "output")
+# relative weights of the block kinds in a page
+MIXES = {
+    "balanced": {"paragraph": 3, "inline": 2, "links": 2, "lists": 2, "code": 1, "heading": 1, "quote": 1},
+    "inline": {"inline": 6, "paragraph": 1, "heading": 1},
+    "links": {"links": 6, "paragraph": 1, "heading": 1},
+    "lists": {"lists": 6, "paragraph": 1, "heading": 1},
+    "code": {"code": 6, "paragraph": 1, "heading": 1},
+}
+
+
+def words(rng, n) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(n))
+
+
+def inline_line(rng, spans=4) -> str:
+    """ A line of text with spans bold, italic or code spans in it """
+    parts = [words(rng, rng.randint(1, 5))]
+    for _ in range(spans):
+        kind = rng.randrange(3)
+        if kind == 0:
+            parts.append(f"**{words(rng, rng.randint(1, 3))}**")
+        elif kind == 1:
+            parts.append(f"*{words(rng, rng.randint(1, 3))}*")
+        else:
+            parts.append(f"`{rng.choice(WORDS)}()`")
+        parts.append(words(rng, rng.randint(1, 5)))
+    return " ".join(parts)
+
+
+def link_line(rng, links=3) -> str:
+    """ A line of text with links links and images in it """
+    parts = [words(rng, rng.randint(1, 4))]
+    for _ in range(links):
+        target = f"https://example.com/{rng.choice(WORDS)}/{rng.randrange(1000)}"
+        if rng.random() < 0.3:
+            parts.append(f"![{words(rng, 2)}]({target}.png)")
+        else:
+            parts.append(f"[{words(rng, rng.randint(1, 3))}]({target})")
+        parts.append(words(rng, rng.randint(1, 4)))
+    return " ".join(parts)
+
+
+def make_block(rng, kind) -> str:
+    if kind == "heading":
+        return "#" * rng.randint(1, 3) + " " + words(rng, rng.randint(2, 6)).capitalize()
+    if kind == "paragraph":
+        return "\n".join(words(rng, rng.randint(8, 16)) for _ in range(rng.randint(1, 4)))
+    if kind == "inline":
+        return "\n".join(inline_line(rng, rng.randint(2, 6)) for _ in range(rng.randint(1, 3)))
+    if kind == "links":
+        return "\n".join(link_line(rng, rng.randint(1, 4)) for _ in range(rng.randint(1, 3)))
+    if kind == "lists":
+        items = rng.randint(5, 40)
+        if rng.random() < 0.5:
+            return "\n".join(f"- {inline_line(rng, rng.randint(0, 2))}" for _ in range(items))
+        return "\n".join(f"{i}. {inline_line(rng, rng.randint(0, 2))}" for i in range(1, items + 1))
+    if kind == "code":
+        return "```\n" + "\n".join(f"{rng.choice(WORDS)}({rng.randrange(100)}) # *not* **parsed**"
+                                   for _ in range(rng.randint(3, 30))) + "\n```"
+    if kind == "quote":
+        return "\n".join(f"> {inline_line(rng, 1)}" for _ in range(rng.randint(1, 4)))
+    raise ValueError(f"Unknown block kind {kind}")
+
+
+def make_page(rng, blocks, mix) -> str:
+    kinds = list(mix)
+    weights = [mix[kind] for kind in kinds]
+    page = ["# " + words(rng, 3).capitalize()]
+    for kind in rng.choices(kinds, weights, k=blocks - 1):
+        page.append(make_block(rng, kind))
+    return "\n\n".join(page) + "\n"
+
+
+def generate_corpus(pages=100, blocks=50, mix="balanced", seed=0) -> dict:
+    """
+    Returns {relative path: markdown} for pages pages of blocks blocks each.
+    mix is the name of one of MIXES or a dict of weights.
+    """
+    if isinstance(mix, str):
+        mix = MIXES[mix]
+    rng = random.Random(seed)
+    return {f"section{i % 10}/page{i}.md": make_page(rng, blocks, mix) for i in range(pages)}
+
+
+def inline_texts(corpus) -> list:
+    """ The text of every paragraph line and list item of the corpus, what text_to_text_node gets fed """
+    texts = []
+    for doc in corpus.values():
+        for block in doc.split("\n\n"):
+            if block.startswith(("```", "#")):
+                continue
+            for line in block.split("\n"):
+                texts.append(line.split(" ", 1)[1] if line.startswith(("- ", "> ")) or line[:1].isdigit() else line)
+    return texts
+
+
+def write_corpus(root, corpus):
+    for rel, doc in corpus.items():
+        path = os.path.join(root, rel)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(doc)
+
+
+def write_assets(root, files=1000, size=4096, seed=0):
+    """ A static/ like tree: files files of size random bytes, spread over a few directories """
+    rng = random.Random(seed)
+    for i in range(files):
+        directory = os.path.join(root, f"assets{i % 8}", f"img{i % 3}")
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, f"file{i}.bin"), "wb") as f:
+            f.write(rng.randbytes(size))
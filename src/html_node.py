@@ -1,3 +1,39 @@
+# attribute strings rendered so far, by the items of the props they were rendered from. A nav link or an
+# image used on every page is rendered once and its nodes share one string. Looking the items up is also
+# what tells a dict changed in place from the one rendered before. Bounded, once full nothing new is kept
+INTERNED_ATTRIBUTES = {}
+INTERN_LIMIT = 4096
+
+
+def render_attributes(props) -> str:
+    """ ' key="value"' for every item of the props dict, values escaped to sit between double quotes """
+    # nodes have one or two props, concatenating beats building a list to join
+    html = ""
+    for k, v in props.items():
+        if type(v) is not str:
+            v = str(v)
+        # most values (urls, alt texts) have nothing to escape, don't allocate for them
+        if "&" in v or '"' in v or "<" in v or ">" in v:
+            v = v.replace("&", "&amp;").replace('"', "&quot;").replace("<", "&lt;").replace(">", "&gt;")
+        html += f' {k}="{v}"'
+    return html
+
+
+def attributes_html(props) -> str:
+    """ render_attributes(props), through INTERNED_ATTRIBUTES """
+    key = tuple(props.items())
+    try:
+        html = INTERNED_ATTRIBUTES.get(key)
+    except TypeError:
+        # an unhashable value (a list...), rendered every time
+        return render_attributes(props)
+    if html is None:
+        html = render_attributes(props)
+        if len(INTERNED_ATTRIBUTES) < INTERN_LIMIT:
+            INTERNED_ATTRIBUTES[key] = html
+    return html
+
+
 class HTMLNode:
     """    
     tag - A string representing the HTML tag name (e.g. "p", "a", "h1", etc.)
@@ -5,23 +41,42 @@ class HTMLNode:
     children - A list of HTMLNode objects representing the children of this node
     props - A dictionary of key-value pairs representing the attributes of the HTML tag. For example, a link (<a> tag) might have {"href": "https://www.google.com"}
     """
+    # no per instance __dict__, a page can have millions of nodes
+    __slots__ = ("tag", "value", "children", "props")
+
     def __init__(self, tag=None, value=None, children=None, props=None):
         self.tag = tag
         self.value = value
         self.children = children
         self.props = props
-        
+
     # Children will have to implement this
     def to_html(self):
         raise NotImplementedError
 
+    def render_into(self, buf):
+        """ Appends the html of this node to the list buf. Nodes that only implement to_html get it for free """
+        buf.append(self.to_html())
+
+    def write_html(self, fp, chunk_size=65536):
+        """
+        Streams the html of this node to fp (any text file object, io.StringIO, socket.makefile("w")...)
+        while walking the tree, in writes of about chunk_size characters. The full string is never built.
+        """
+        writer = ChunkWriter(fp, chunk_size)
+        self.render_into(writer)
+        writer.flush()
+
     def props_to_html(self):
-        if self.props:
-            res = []
-            for k, v in self.props.items():
-                res.append(f' {k}="{v}"')
-            return ''.join(res)
-        return ""
+        """
+        The attributes of the node, values escaped. Nodes are not cached one by one: the string comes from
+        INTERNED_ATTRIBUTES, looked up by the current items of the props, so props changed in place
+        through any reference to the dict are rendered again.
+        """
+        props = self.props
+        if not props:
+            return ""
+        return attributes_html(props)
     
     def __repr__(self):
         return f"""HTMLNode object:
@@ -31,9 +86,36 @@ class HTMLNode:
         props:{self.props_to_html()}
         """
         
+class ChunkWriter:
+    """ Stands in for the list given to render_into, passes what it gets to fp.write in chunks """
+    def __init__(self, fp, chunk_size=65536):
+        self.fp = fp
+        self.chunk_size = chunk_size
+        self.parts = []
+        self.size = 0
+
+    def append(self, s):
+        self.parts.append(s)
+        self.size += len(s)
+        if self.size >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        if self.parts:
+            self.fp.write("".join(self.parts))
+            self.parts = []
+            self.size = 0
+
+
 class LeafNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self,tag, value, props=None):
-        super().__init__(tag, value, None, props)
+        # assigned directly rather than through super().__init__, one leaf is created per inline span
+        self.tag = tag
+        self.value = value
+        self.children = None
+        self.props = props
         
     def to_html(self):
         if self.tag == "img":
@@ -48,17 +130,88 @@ class LeafNode(HTMLNode):
         return f"LeafNode({self.tag}, {self.value}, {self.props})"
     
 class ParentNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self,tag,children, props=None):
-        super().__init__(tag, None, children, props)
+        self.tag = tag
+        self.value = None
+        self.children = children
+        self.props = props
     
     def to_html(self):
-        if not self.tag:
-            raise ValueError("All Parent Nodes must have at tag")
-        if not self.children:
-            raise ValueError("Must have children")
-        res = ""
-        for c in self.children:
-            res += c.to_html()
-        return f"<{self.tag}{self.props_to_html()}>{res}</{self.tag}>"
-
-    
\ No newline at end of file
+        # the whole tree is written into one buffer and joined once, instead of concatenating at every level
+        buf = []
+        self.render_into(buf)
+        return "".join(buf)
+
+    def render_into(self, buf):
+        """
+        Walks the tree with explicit stacks instead of recursing, so nesting costs no Python frames
+        and there is no recursion limit. A child ParentNode with only leaves in it (a paragraph,
+        a list item) is rendered on the spot, the stacks only grow for deeper nesting.
+        Other nodes (custom HTMLNodes) render themselves.
+        """
+        append = buf.append
+        if not self.tag or not self.children:
+            check_parent(self)
+        append(f"<{self.tag}{self.props_to_html()}>")
+        node = self
+        children = iter(self.children)
+        # the parents of node and where their children were left, node's children are walked
+        nodes = []
+        iterators = []
+        while True:
+            for c in children:
+                t = type(c)
+                if t is LeafNode:
+                    # leaves are most of the tree, skip a method call for them
+                    append(c.to_html())
+                elif t is ParentNode or is_plain_parent(c):
+                    if not c.tag or not c.children:
+                        check_parent(c)
+                    append(f"<{c.tag}{c.props_to_html()}>")
+                    inner = iter(c.children)
+                    for g in inner:
+                        if type(g) is LeafNode:
+                            append(g.to_html())
+                            continue
+                        # c has nested nodes: carry on from g with c as the current node
+                        nodes.append(node)
+                        iterators.append(children)
+                        node = c
+                        children = inner
+                        if type(g) is ParentNode or is_plain_parent(g):
+                            if not g.tag or not g.children:
+                                check_parent(g)
+                            append(f"<{g.tag}{g.props_to_html()}>")
+                            nodes.append(node)
+                            iterators.append(children)
+                            node = g
+                            children = iter(g.children)
+                        else:
+                            g.render_into(buf)
+                        break
+                    else:
+                        append(f"</{c.tag}>")
+                        continue
+                    break
+                else:
+                    c.render_into(buf)
+            else:
+                append(f"</{node.tag}>")
+                if not nodes:
+                    return
+                node = nodes.pop()
+                children = iterators.pop()
+
+
+def is_plain_parent(node) -> bool:
+    """ A ParentNode subclass that ParentNode.render_into can walk, i.e. one that doesn't render itself differently """
+    return isinstance(node, ParentNode) and type(node).render_into is ParentNode.render_into
+
+
+def check_parent(node):
+    if not node.tag:
+        raise ValueError("All Parent Nodes must have at tag")
+    if not node.children:
+        raise ValueError("Must have children")
@@ -0,0 +1,87 @@
+import sys
+from collections import OrderedDict
+from html_node import LeafNode
+from md_to_text_node import text_to_text_node
+from textnode import text_node_to_html_node
+
+"""
+Optional memoization of inline parsing, for documents that repeat the same list items,
+headings and table of contents lines over and over.
+The cache keeps an immutable description of the leaves of each inline string and builds
+new LeafNodes from it on every hit, so callers never share nodes (or props dicts).
+"""
+
+# rough cost of a cached leaf on top of its strings: the tuple and its slots
+LEAF_OVERHEAD = 80
+# the InlineCache of this process, kept across the pages and chunks a worker renders (see worker_cache)
+process_cache = None
+
+
+class InlineCache:
+    """
+    LRU cache {inline text: leaves}, bounded by an estimate of its size in bytes.
+    Counts hits, misses and evictions.
+    """
+    def __init__(self, max_bytes=16 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.sizes = {}
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def children(self, text) -> list:
+        """ Same result as md_to_blocks.text_to_children(text), parsed once per distinct text """
+        leaves = self.entries.get(text)
+        if leaves is not None:
+            self.hits += 1
+            self.entries.move_to_end(text)
+            return [LeafNode(tag, value, dict(props) if props is not None else None) for tag, value, props in leaves]
+        self.misses += 1
+        nodes = [text_node_to_html_node(text_node) for text_node in text_to_text_node(text)]
+        self.put(text, tuple((n.tag, n.value, tuple(n.props.items()) if n.props is not None else None) for n in nodes))
+        return nodes
+
+    def put(self, text, leaves):
+        size = sys.getsizeof(text)
+        for tag, value, props in leaves:
+            size += LEAF_OVERHEAD + sys.getsizeof(value)
+            if props:
+                size += sum(sys.getsizeof(k) + sys.getsizeof(v) for k, v in props)
+        if size > self.max_bytes:
+            return
+        self.entries[text] = leaves
+        self.sizes[text] = size
+        self.bytes += size
+        while self.bytes > self.max_bytes:
+            old, _ = self.entries.popitem(last=False)
+            self.bytes -= self.sizes.pop(old)
+            self.evictions += 1
+
+    def clear(self):
+        self.entries.clear()
+        self.sizes.clear()
+        self.bytes = 0
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self.entries),
+            "bytes": self.bytes,
+        }
+
+
+def worker_cache(max_bytes):
+    """
+    The InlineCache of this process, for workers rendering page after page or chunk after chunk.
+    Made on first use and made again when max_bytes changes. None without max_bytes.
+    """
+    global process_cache
+    if not max_bytes:
+        return None
+    if process_cache is None or process_cache.max_bytes != max_bytes:
+        process_cache = InlineCache(max_bytes)
+    return process_cache
@@ -1,28 +1,76 @@
 from textnode import *
-import os
-import shutil
+from assets import parallel_copy_files, sync_files, list_files, save_paths, save_json, DEFAULT_MANIFEST, PUBLISH_MODES
+from build import build_pages, format_report, DEFAULT_CACHE
+from output import DEFAULT_CONCURRENCY
+from watch import watch
+from serve import serve, DEFAULT_PAGE_CACHE
+import profiling
+import argparse
+import sys
 
-def main():
-    copy_files("static/", "public/")
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the site into public/")
+    parser.add_argument("--clean", action="store_true", help="wipe public/, copy every static file and render every page again")
+    parser.add_argument("--manifest", default=DEFAULT_MANIFEST, help="where the static asset manifest is kept")
+    parser.add_argument("--jobs", type=int, default=None, help="number of threads copying static files (default: picked by the thread pool)")
+    parser.add_argument("--mode", choices=PUBLISH_MODES, default="copy", help="how static files are put in public/, falls back to copy when the filesystem can't")
+    parser.add_argument("--content", default="content/", help="directory of the markdown pages")
+    parser.add_argument("--template", default=None, help="html template with {{ Title }} and {{ Content }} placeholders")
+    parser.add_argument("--cache", default=DEFAULT_CACHE, help="where the page build cache is kept")
+    parser.add_argument("--workers", type=int, default=None, help="number of processes rendering pages (default: one per cpu)")
+    parser.add_argument("--inline-cache", type=float, default=None, metavar="MB",
+                        help="memoize inline parsing of repeated lines, with a cache of this many MB per worker")
+    parser.add_argument("--write-concurrency", type=int, default=DEFAULT_CONCURRENCY, metavar="N",
+                        help="pages each worker writes at once while rendering the next ones")
+    parser.add_argument("--changed", default=None, metavar="FILE",
+                        help="write the paths of public/ that this build wrote or removed to FILE, one per line")
+    parser.add_argument("--watch", action="store_true", help="after the build, keep rebuilding what changes in static/ and the content directory")
+    parser.add_argument("--serve", action="store_true",
+                        help="don't build, serve the site on --port instead, pages rendered on request and static/ as is")
+    parser.add_argument("--port", type=int, default=8000, help="port of the dev server")
+    parser.add_argument("--page-cache", type=float, default=DEFAULT_PAGE_CACHE / (1024 * 1024), metavar="MB",
+                        help="memory for the rendered pages kept by the dev server")
+    parser.add_argument("--profile", default=None, metavar="JSON",
+                        help="time every build stage and page, write the numbers to this file and print a summary")
+    parser.add_argument("--profile-top", type=int, default=10, metavar="N", help="how many of the slowest pages the summary lists")
+    args = parser.parse_args(argv)
+
+    if args.serve:
+        serve("static/", args.content, args.template, port=args.port, cache_bytes=int(args.page_cache * 1024 * 1024))
+        return 0
+    if args.profile:
+        profiling.enable()
+    changed = []
+    if args.clean:
+        copied = parallel_copy_files("static/", "public/", args.jobs, args.mode)
+        print(f"static: {copied} copied")
+    else:
+        stats = sync_files("static/", "public/", args.manifest, args.jobs, args.mode, changed)
+        print(f"static: {stats['copied']} copied, {stats['skipped']} skipped, {stats['removed']} removed")
+    # a clean public/ has no outputs left, every page misses the cache and is rendered
+    inline_cache_bytes = int(args.inline_cache * 1024 * 1024) if args.inline_cache else None
+    report = build_pages(args.content, "public/", args.workers, template_path=args.template, cache_path=args.cache,
+                         inline_cache_bytes=inline_cache_bytes, profile=bool(args.profile),
+                         write_concurrency=args.write_concurrency)
+    print(format_report(report))
+    if args.changed:
+        # a clean build wrote everything
+        paths = sorted(list_files("public/")) if args.clean else sorted(set(changed) | set(report["changed"]))
+        save_paths(args.changed, paths)
+        print(f"changed: {len(paths)} paths listed in {args.changed}")
+    if args.profile:
+        # the static copy is in there too, it ran in this process
+        profile = profiling.disable().to_dict()
+        save_json(args.profile, profile)
+        print(profiling.format_profile(profile, args.profile_top))
+    if args.watch:
+        print(f"watching static/ and {args.content} (ctrl-c to stop)")
+        try:
+            watch("static/", args.content, "public/", args.template, args.mode, manifest_path=args.manifest,
+                  cache_path=args.cache)
+        except KeyboardInterrupt:
+            pass
     return 0
 
-    
-def copy_files(src, dst, is_root=True):
-    if os.path.exists(dst) and is_root:
-        shutil.rmtree(dst)
-    if is_root:
-        os.mkdir(dst)
-    contents = os.listdir(src)
-    print(contents)
-    for content in contents:
-        src_path = os.path.join(src, content)
-        dst_path = os.path.join(dst, content)
-        if os.path.isfile(src_path):
-            shutil.copy(src_path, dst_path)
-        elif os.path.isdir(src_path):
-            os.mkdir(dst_path)
-            copy_files(src_path, dst_path, is_root=False)
-    # shutil.copytree(src, dst)       
 if __name__ == '__main__':
-    main()
-    
+    sys.exit(main())
@@ -2,14 +2,24 @@ from enum import Enum
 from html_node import *
 from textnode import *
 from md_to_text_node import *
+from typing import Iterator
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from inline_cache import worker_cache
+import mmap
+import os
 import re
 """ 
-In our simple markdown parser, we are not allowed to put blank lines inside the code blocks. The parsing done is very simplistic by splitting the original document (string) with the \n\n delimiter.
-Inserting blank lines inside code blocks will split the code block.
+In our simple markdown parser, blocks are separated by blank lines (see iter_blocks).
+Fenced code blocks are the exception: a blank line inside them doesn't end the block.
 
 
 """
 
+# smallest chunk of markdown (in characters) sent to a worker by markdown_to_html_node(jobs=...),
+# below that pickling and scheduling cost more than the parsing
+MIN_BLOCK_CHUNK = 64 * 1024
+
 class BlockType(Enum):
     HEADING = 1
     CODEBLOCK = 2
@@ -19,81 +29,272 @@ class BlockType(Enum):
     PARA = 6
 
 def block_to_block_type(block: str) -> BlockType :
-    lines = block.split("\n")
-    if re.search(r"(^#{1,6} )", block) :
+    """
+    The first character tells which block type is possible at all, only that type is checked,
+    everything that doesn't pass is a paragraph.
+    """
+    if not block:
+        return BlockType.PARA
+    classify = BLOCK_CLASSIFIERS.get(block[0])
+    if classify is None:
+        return BlockType.PARA
+    return classify(block)
+
+def heading_block_type(block):
+    # 1 to 6 hashes then a space
+    number_of_hashes = 0
+    while number_of_hashes < 7 and block.startswith("#", number_of_hashes):
+        number_of_hashes += 1
+    if number_of_hashes <= 6 and block.startswith(" ", number_of_hashes):
         return BlockType.HEADING
-    if len(lines) > 1 and lines[0].startswith("```") and lines[-1].startswith("```"):
+    return BlockType.PARA
+
+def code_block_type(block):
+    # more than one line, the first and the last one start with ```
+    last_line = block.rfind("\n") + 1
+    if last_line > 0 and block.startswith("```") and block.startswith("```", last_line):
         return BlockType.CODEBLOCK
-    # multi line case
-    if all(line.startswith('>') for line in lines):
+    return BlockType.PARA
+
+def quote_block_type(block):
+    # every line starts with >, i.e. every newline is followed by one
+    if block.count("\n") == block.count("\n>"):
         return BlockType.QUOTEBLOCK
-    if all(line.startswith('- ') for line in lines):
+    return BlockType.PARA
+
+def ulist_block_type(block):
+    if block.startswith("- ") and block.count("\n") == block.count("\n- "):
         return BlockType.ULIST
-    # Check if the ordered list rule is followed
-    for i in range(len(lines)):
-        # if we find an error, set the block to paragraph (last case)
-        if not lines[i].startswith(f"{i + 1}."): # start from 1
+    return BlockType.PARA
+
+def olist_block_type(block):
+    # line i starts with "i." counting from 1
+    number = 1
+    position = 0
+    while True:
+        if not block.startswith(f"{number}.", position):
             return BlockType.PARA
-    # All checks passed
-    return BlockType.OLIST
+        position = block.find("\n", position) + 1
+        if position == 0:
+            return BlockType.OLIST
+        number += 1
+
+BLOCK_CLASSIFIERS = {
+    "#": heading_block_type,
+    "`": code_block_type,
+    ">": quote_block_type,
+    "-": ulist_block_type,
+    "1": olist_block_type,
+}
     
 
+def iter_blocks(lines) -> Iterator[str]:
+    """
+    Yields the blocks of a markdown document as soon as each one ends.
+    lines is a file object or any iterable of lines, with or without their trailing newline.
+    A block ends at an empty line, except inside a fenced code block (a block starting with ```),
+    which runs until its closing ``` line so that it can hold blank lines.
+    Blocks are stripped of surrounding whitespace and blank ones are dropped.
+    """
+    block = []
+    has_text = False
+    in_fence = False
+    for line in lines:
+        if line.endswith("\n"):
+            line = line[:-1]
+        if in_fence:
+            block.append(line)
+            if line.lstrip().startswith("```"):
+                in_fence = False
+            continue
+        if line == "":
+            if block:
+                text = "\n".join(block).strip()
+                block = []
+                has_text = False
+                if text:
+                    yield text
+            continue
+        if not has_text and line.strip():
+            # first line of the block with some text, a fence can only open here
+            has_text = True
+            fence = line.strip()
+            in_fence = fence.startswith("```") and fence.count("```") == 1
+        block.append(line)
+    if block:
+        text = "\n".join(block).strip()
+        if text:
+            yield text
+
+# a line that ends a block: empty, with unix or windows line endings
+BLANK_LINE_RE = re.compile(rb"\n\r?\n")
+# a line that closes a fence: ``` after some indentation
+FENCE_CLOSE_RE = re.compile(rb"\n[^\S\n]*```")
+NOT_SPACE_RE = re.compile(rb"\S")
+
+def iter_mmap_blocks(path) -> Iterator[str]:
+    """
+    Same blocks as iter_blocks(open(path)), for huge files: the file is memory mapped and block
+    boundaries are searched in the raw bytes, then each block alone is decoded (utf-8).
+    Only ascii whitespace counts as blank when looking for boundaries.
+    """
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            size = len(mm)
+            pos = 0
+            while pos < size:
+                # skip the blank lines before the block
+                if mm[pos:pos + 1] == b"\n":
+                    pos += 1
+                    continue
+                if mm[pos:pos + 2] == b"\r\n":
+                    pos += 2
+                    continue
+                blank = BLANK_LINE_RE.search(mm, pos)
+                end = blank.start() if blank else size
+                first_text = NOT_SPACE_RE.search(mm, pos, end)
+                if first_text is None:
+                    # only whitespace, dropped like in iter_blocks
+                    pos = blank.end() if blank else size
+                    continue
+                line_end = mm.find(b"\n", first_text.start())
+                line_end = size if line_end == -1 else line_end
+                opening = mm[first_text.start():line_end].strip()
+                if opening.startswith(b"```") and opening.count(b"```") == 1:
+                    # blank lines don't count until the fence is closed
+                    close = FENCE_CLOSE_RE.search(mm, line_end)
+                    if close is None:
+                        blank = None
+                    else:
+                        blank = BLANK_LINE_RE.search(mm, close.end())
+                    end = blank.start() if blank else size
+                text = mm[pos:end].decode("utf-8").replace("\r\n", "\n").strip()
+                if text:
+                    yield text
+                pos = blank.end() if blank else size
+
 def markdown_to_blocks(doc : str) -> []:
     """
     Takes raw markdown string and turns it into a list of blocks of string.
     """
     # blocks are seperations of different sections of a doc, denoted by a single blank line
-    sections = list(filter(None, doc.split('\n\n')))
-    # Remove trailing whitespaces
-    result = [s.strip() for s in sections ]
-    return result    
+    return list(iter_blocks(doc.split("\n")))
 
-def markdown_to_html_node(doc : str) -> HTMLNode:
+def markdown_to_html_node(doc : str, inline_cache=None, jobs=None, chunk_size=None) -> HTMLNode:
+    """
+    inline_cache is an optional inline_cache.InlineCache, shared between calls to avoid parsing
+    the same inline text twice.
+    With jobs > 1 the blocks are parsed and rendered on a pool of that many processes, in chunks of
+    about chunk_size characters (default: four chunks per worker, at least MIN_BLOCK_CHUNK).
+    Workers send back html, not nodes, so the children of the returned div are then one raw
+    LeafNode per chunk. The html is the same as the serial one. A worker keeps its own InlineCache
+    of inline_cache.max_bytes, the one given is not used.
+    """
     root = ParentNode("div", children=[])
-    for text_block in markdown_to_blocks(doc):
-        type = block_to_block_type(text_block)
-        if type == BlockType.CODEBLOCK :
-            inner = text_block.strip() # trim outer whitespaces
-            inner = inner.removeprefix("```").removesuffix("```")
-            inner = inner.lstrip("\n")
-            wrapper = ParentNode("pre", [LeafNode("code", inner)])
-            root.children.append(wrapper)
-            # root.children.append(LeafNode("code", text_block.strip("```")))
-        elif type == BlockType.ULIST:
-            ulist_elements = []
-            for line in text_block.split("\n") :
-                if not line.strip():
-                    continue
-                ulist_elements.append(ParentNode("li", text_to_children(line.lstrip("- "))))
-            root.children.append(ParentNode("ul", ulist_elements))
-        elif type == BlockType.OLIST:
-            olist_elements = []
-            for line in text_block.split("\n"):
-                # Remove the numbering system, values on the right part of the line
-                olist_elements.append(ParentNode("li", text_to_children(line.split(". ")[1])))
-            root.children.append(ParentNode("ol", olist_elements))
-        elif type == BlockType.HEADING:
-            number_of_hashes = 0
-            for i in range(0, 6):
-                if text_block[i] != "#":
-                    break
-                number_of_hashes += 1
-            hashes = "#"*number_of_hashes+" "
-            content = text_to_children(text_block.strip(hashes))
-            root.children.append(ParentNode(f"h{number_of_hashes}", content))
-        elif type == BlockType.QUOTEBLOCK:
-            lines = text_block.split("\n")
-            clean_lines = [line.lstrip("> ") for line in lines]
-            children = text_to_children("\n".join(clean_lines))
-            root.children.append(ParentNode("blockquote", children))
-        else:
-            edited_text = text_block.replace("\n"," ")
-            html_node_of_text_block = ParentNode("p", text_to_children(edited_text))
-            root.children.append(html_node_of_text_block)
+    blocks = markdown_to_blocks(doc)
+    if jobs is not None and jobs > 1:
+        if chunk_size is None:
+            chunk_size = max(MIN_BLOCK_CHUNK, len(doc) // (jobs * 4))
+        chunks = chunk_blocks(blocks, chunk_size)
+        if len(chunks) > 1:
+            cache_bytes = inline_cache.max_bytes if inline_cache is not None else None
+            with ProcessPoolExecutor(max_workers=jobs) as executor:
+                for html in executor.map(render_blocks_html, chunks, repeat(cache_bytes)):
+                    root.children.append(LeafNode(None, html))
+            return root
+    for text_block in blocks:
+        root.children.append(block_to_html_node(text_block, inline_cache))
     return root
 
-def text_to_children(inline):
+def chunk_blocks(blocks, chunk_size) -> list:
+    """ Groups consecutive blocks into lists of about chunk_size characters, keeping their order """
+    chunks = []
+    chunk = []
+    size = 0
+    for text_block in blocks:
+        chunk.append(text_block)
+        size += len(text_block)
+        if size >= chunk_size:
+            chunks.append(chunk)
+            chunk = []
+            size = 0
+    if chunk:
+        chunks.append(chunk)
+    return chunks
+
+def render_blocks_html(blocks, inline_cache_bytes=None) -> str:
+    """ Worker side of markdown_to_html_node(jobs=...): the html of a chunk of blocks """
+    cache = worker_cache(inline_cache_bytes)
+    buf = []
+    for text_block in blocks:
+        block_to_html_node(text_block, cache).render_into(buf)
+    return "".join(buf)
+
+def write_markdown_html(lines, fp, inline_cache=None):
+    """
+    Streaming version of markdown_to_html_node(doc).write_html(fp): reads the markdown from lines
+    (e.g. an open file) and writes the html of each block as soon as the block ends, so memory
+    stays bounded by the largest block instead of the whole document.
+    """
+    write_blocks_html(iter_blocks(lines), fp, inline_cache)
+
+def write_blocks_html(blocks, fp, inline_cache=None):
+    """ Writes the html of the markdown blocks (from iter_blocks or iter_mmap_blocks) to fp, one block at a time """
+    started = False
+    for text_block in blocks:
+        if not started:
+            fp.write("<div>")
+            started = True
+        block_to_html_node(text_block, inline_cache).write_html(fp)
+    if not started:
+        # same error as rendering an empty markdown_to_html_node
+        raise ValueError("Must have children")
+    fp.write("</div>")
+
+def block_to_html_node(text_block, inline_cache=None) -> HTMLNode:
+    type = block_to_block_type(text_block)
+    if type == BlockType.CODEBLOCK :
+        inner = text_block.strip() # trim outer whitespaces
+        inner = inner.removeprefix("```").removesuffix("```")
+        inner = inner.lstrip("\n")
+        return ParentNode("pre", [LeafNode("code", inner)])
+    elif type == BlockType.ULIST:
+        ulist_elements = []
+        for line in text_block.split("\n") :
+            if not line.strip():
+                continue
+            ulist_elements.append(ParentNode("li", text_to_children(line.lstrip("- "), inline_cache)))
+        return ParentNode("ul", ulist_elements)
+    elif type == BlockType.OLIST:
+        olist_elements = []
+        for line in text_block.split("\n"):
+            # Remove the numbering system, values on the right part of the line
+            olist_elements.append(ParentNode("li", text_to_children(line.split(". ")[1], inline_cache)))
+        return ParentNode("ol", olist_elements)
+    elif type == BlockType.HEADING:
+        number_of_hashes = 0
+        for i in range(0, 6):
+            if text_block[i] != "#":
+                break
+            number_of_hashes += 1
+        hashes = "#"*number_of_hashes+" "
+        content = text_to_children(text_block.strip(hashes), inline_cache)
+        return ParentNode(f"h{number_of_hashes}", content)
+    elif type == BlockType.QUOTEBLOCK:
+        lines = text_block.split("\n")
+        clean_lines = [line.lstrip("> ") for line in lines]
+        children = text_to_children("\n".join(clean_lines), inline_cache)
+        return ParentNode("blockquote", children)
+    else:
+        edited_text = text_block.replace("\n"," ")
+        return ParentNode("p", text_to_children(edited_text, inline_cache))
+
+def text_to_children(inline, inline_cache=None):
     """ Transforms a inline text to a list of LeafNodes"""
+    if inline_cache is not None:
+        return inline_cache.children(inline)
     root = []
     text_nodes = text_to_text_node(inline)
     for text_node in text_nodes:
@@ -120,7 +321,8 @@ def determine_tag_type(text, type ):
     else :
         return "p"
 
-md = """
+if __name__ == "__main__":
+    md = """
 This is **bolded** paragraph
 text in a p
 tag here
@@ -128,12 +330,12 @@ tag here
 This is another paragraph with *italic* text and `print('hello world')` here
 
 """
-md2 = """
+    md2 = """
 ```
 This is text that *should* remain
 the **same** even with inline stuff
 ```
 
 """
-print(markdown_to_html_node(md).to_html())
-print(markdown_to_html_node(md2).to_html())
\ No newline at end of file
+    print(markdown_to_html_node(md).to_html())
+    print(markdown_to_html_node(md2).to_html())
\ No newline at end of file
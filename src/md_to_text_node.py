@@ -1,19 +1,75 @@
 from textnode import *
-from typing import List, Tuple
+from typing import Iterator, List, Tuple
 import re
 
 """
 Functions that turn a block of text into a list of text nodes
 Searches for bold, italic, code, images and links
 """
+
+# compiled once here rather than looked up in re's cache on every call
+IMAGE_RE = re.compile(r"!\[([^\[\]]*)\]\(([^\(\)]*)\)")
+LINK_RE = re.compile(r"(?<!!)\[([^\[\]]*)\]\(([^\(\)]*)\)")
+DELIMITER_RE = re.compile(r"[*`]")
+
 def text_to_text_node(text : str) -> List[TextNode]:
-    initial_text_node = TextNode(text, TextType.TEXT)
-    x_0 = split_nodes_delimiter([initial_text_node], "**", TextType.BOLD)
-    x_1 = split_nodes_delimiter(x_0, '*', TextType.ITALIC)
-    x_2 = split_nodes_delimiter(x_1, '`', TextType.CODE)
-    x_3 = split_nodes_image(x_2)
-    x_4 = split_nodes_link(x_3)
-    return x_4
+    """
+    Single sweep over the text that gives the same nodes as running split_nodes_delimiter
+    for **, * and `, then split_nodes_image and split_nodes_link, one after the other:
+    - ** pairs first, its content is kept as is
+    - then *, which can't contain a ** (that ** would end the text around it, leaving the * unmatched)
+    - then `, which can't contain any * for the same reason
+    - images and links are only looked for in the plain text left between those
+    An odd delimiter raises the same "Unmatched delimiter" exception as split_nodes_delimiter.
+    """
+    if not text:
+        return [TextNode(text, TextType.TEXT)]
+    nodes = []
+    start = 0
+    while True:
+        match = DELIMITER_RE.search(text, start)
+        if match is None:
+            append_text_with_media(text[start:], nodes)
+            return nodes
+        i = match.start()
+        if text.startswith("**", i):
+            end = text.find("**", i + 2)
+            width, text_type = 2, TextType.BOLD
+        elif text[i] == "*":
+            end = text.find("*", i + 1)
+            if end != -1 and text.startswith("**", end):
+                end = -1
+            width, text_type = 1, TextType.ITALIC
+        else:
+            end = text.find("`", i + 1)
+            if end != -1 and "*" in text[i + 1:end]:
+                end = -1
+            width, text_type = 1, TextType.CODE
+        if end == -1:
+            raise Exception("Unmatched delimiter")
+        append_text_with_media(text[start:i], nodes)
+        if end > i + width:
+            nodes.append(TextNode(text[i + width:end], text_type))
+        start = end + width
+
+def append_text_with_media(text, nodes):
+    """ Appends the plain text, with its images then links split out, to nodes """
+    if not text:
+        return
+    if "](" not in text:
+        # no image or link can be in there, skip the regexes
+        nodes.append(TextNode(text, TextType.TEXT))
+        return
+    position = 0
+    for match in iter_markdown_images(text):
+        append_text_with_links(text[position:match.start()], nodes)
+        nodes.append(TextNode(match.group(1), TextType.IMAGE, match.group(2)))
+        position = match.end()
+    append_text_with_links(text[position:], nodes)
+
+def append_text_with_links(text, nodes):
+    if text:
+        append_split_at_matches(text, iter_markdown_links(text), nodes)
 
 # The two functions below return a list of key value pairs, the alt text follow by their respective links
 def extract_markdown_images(text : str) -> List[Tuple[str, str]]:
@@ -21,14 +77,20 @@ def extract_markdown_images(text : str) -> List[Tuple[str, str]]:
     From a given a text, returns a list of dictionnaries that represent a markdown image.
     beginning of para ![alt text](image.jpg) lipsum sola => ("lalt text":"image.jpg",) 
     """
-    img_regex = r"!\[([^\[\]]*)\]\(([^\(\)]*)\)"
-    matches = re.findall(img_regex, text)
+    matches = IMAGE_RE.findall(text)
     return matches
 
 def extract_markdown_link(text : str) -> List[Tuple[str, str]]:
     #  	[title](https://www.example.com)
-    link_regex = r"(?<!!)\[([^\[\]]*)\]\(([^\(\)]*)\)"
-    return re.findall(link_regex, text)
+    return LINK_RE.findall(text)
+
+# Same matches as the two functions above, as re.Match objects:
+# match.span() is where the markdown sits in text, match.group(1) the alt text and match.group(2) the url
+def iter_markdown_images(text : str) -> Iterator[re.Match]:
+    return IMAGE_RE.finditer(text)
+
+def iter_markdown_links(text : str) -> Iterator[re.Match]:
+    return LINK_RE.finditer(text)
 
 
 
@@ -63,24 +125,12 @@ def split_nodes_image(old_nodes : List[TextNode]) -> List[TextNode]:
             new_nodes.append(node)
             continue
 
-        list_of_matches = extract_markdown_images(node.text)
-        # we have a list of tuples of image matches
+        list_of_matches = list(iter_markdown_images(node.text))
+        # we have a list of image matches
         if not list_of_matches:
             new_nodes.append(node)
             continue
-        current_text = node.text
-        # still have to split the node
-        for (alt, url) in list_of_matches:
-            # build the string    
-            pattern = f"![{alt}]({url})"      
-            before, after = current_text.split(pattern, 1) 
-            if before:
-                new_nodes.append(TextNode(before, TextType.TEXT))
-            new_nodes.append(TextNode(alt, TextType.IMAGE, url))
-            current_text = after
-        # add the final element
-        if current_text != "":
-            new_nodes.append(TextNode(current_text, TextType.TEXT))
+        append_split_at_matches(node.text, list_of_matches, new_nodes)
     return new_nodes
 
 def split_nodes_link(old_nodes : List[TextNode]) -> List[TextNode]:
@@ -90,22 +140,26 @@ def split_nodes_link(old_nodes : List[TextNode]) -> List[TextNode]:
             new_nodes.append(node)
             continue
 
-        list_of_matches = extract_markdown_link(node.text)
-        # we have a list of tuples of image matches
+        list_of_matches = list(iter_markdown_links(node.text))
+        # we have a list of link matches
         if not list_of_matches:
             new_nodes.append(node)
             continue
-        current_text = node.text
-        # still have to split the node
-        for (alt, url) in list_of_matches:
-            # build the string    
-            pattern = f"[{alt}]({url})"      
-            before, after = current_text.split(pattern, 1) 
-            if before:
-                new_nodes.append(TextNode(before, TextType.TEXT))
-            new_nodes.append(TextNode(alt, TextType.IMAGE, url))
-            current_text = after
-        # this is the remainder 
-        if current_text != "":
-            new_nodes.append(TextNode(current_text, TextType.TEXT))
+        append_split_at_matches(node.text, list_of_matches, new_nodes)
     return new_nodes
+
+def append_split_at_matches(text, matches, new_nodes):
+    """
+    Cuts text at the offsets of the image/link matches in one forward pass: the text around them
+    becomes TEXT nodes and each match an IMAGE node (links too, as before).
+    """
+    position = 0
+    for match in matches:
+        start = match.start()
+        if start > position:
+            new_nodes.append(TextNode(text[position:start], TextType.TEXT))
+        new_nodes.append(TextNode(match.group(1), TextType.IMAGE, match.group(2)))
+        position = match.end()
+    # this is the remainder
+    if position < len(text):
+        new_nodes.append(TextNode(text[position:], TextType.TEXT))
@@ -0,0 +1,149 @@
+import asyncio
+import hashlib
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+"""
+Output stage of the build, between rendering and the disk.
+write_outputs takes the rendered pages as they come and writes them on a pool of threads, at most
+concurrency at a time, while the next pages are being rendered. On a slow disk or a network mount the
+latency of each write then overlaps with the other writes and with rendering instead of adding up.
+Every file is written to a temporary file renamed over it, so nobody ever reads half a page, and a file
+that already holds the same bytes is not written at all: its mtime stays, rsync and CDNs see no change.
+Outputs are content addressed: given the entry {"size", "mtime_ns", "sha256"} of what the last build wrote
+to a path, and the file still having that size and mtime, a page that hashes the same is known to be unchanged
+without reading the file back, and one that doesn't is written right away. A file something else wrote to
+since has another mtime, it is compared with the page.
+"""
+
+DEFAULT_CONCURRENCY = 16
+
+
+def same_content(path, data) -> bool:
+    """ True when path is a file holding exactly data. The sizes are compared first, without reading """
+    try:
+        if os.path.getsize(path) != len(data):
+            return False
+        with open(path, "rb") as f:
+            return f.read() == data
+    except OSError:
+        return False
+
+
+def temp_path(path) -> str:
+    # unique per process and thread, two writers of the same path never share a temporary file
+    return f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+
+def replace_file(path, data):
+    """ Writes data to a temporary file next to path, then renames it over path """
+    tmp = temp_path(path)
+    try:
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def output_entry(path, digest) -> dict:
+    """ What the manifest keeps of an output: its size and mtime when it was written, and its sha256 """
+    st = os.stat(path)
+    return {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "sha256": digest}
+
+
+def untouched(path, known) -> bool:
+    """ True when path still has the size and mtime of known, its entry (see output_entry): nothing wrote to it since """
+    if not known:
+        return False
+    try:
+        st = os.stat(path)
+    except OSError:
+        return False
+    return st.st_size == known["size"] and st.st_mtime_ns == known["mtime_ns"]
+
+
+def write_file(path, data, known=None) -> tuple:
+    """
+    Atomically replaces path with data, unless path already holds data.
+    known is the entry of what was last written to path (see output_entry). While path is untouched, its
+    sha256 tells whether it holds data, otherwise the file is read and compared with data.
+    Returns (whether it wrote, the entry of path).
+    """
+    digest = hashlib.sha256(data).hexdigest()
+    if untouched(path, known):
+        if known["sha256"] == digest:
+            return False, known
+    elif same_content(path, data):
+        return False, output_entry(path, digest)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    replace_file(path, data)
+    return True, output_entry(path, digest)
+
+
+async def write_outputs(outputs, concurrency=DEFAULT_CONCURRENCY, known=None) -> dict:
+    """
+    Writes every (path, bytes) of outputs with write_file, at most concurrency at once.
+    known is {path: entry of what was last written there} (see write_file).
+    outputs is usually a generator rendering the pages: it runs on the event loop, the writes run on
+    concurrency threads, so pages are rendered while the previous ones are being written. With concurrency
+    writes in flight, rendering waits for one of them to finish, which also bounds the pages held in memory.
+    The first error, of outputs or of a write, stops rendering and is raised once the started writes are done.
+    Returns {"files", "written", "unchanged", "bytes" (written), "seconds" (first write to last),
+    "waited" (time rendering was blocked on the writes), "entries" ({path: entry} of every file),
+    "changed" (the paths written)}.
+    """
+    loop = asyncio.get_running_loop()
+    slots = asyncio.Semaphore(concurrency)
+    known = known or {}
+    stats = {"files": 0, "written": 0, "unchanged": 0, "bytes": 0, "seconds": 0.0, "waited": 0.0,
+             "entries": {}, "changed": []}
+    errors = []
+    futures = []
+
+    def done(future, path, size):
+        slots.release()
+        if future.exception() is not None:
+            errors.append(future.exception())
+            return
+        wrote, stats["entries"][path] = future.result()
+        if wrote:
+            stats["written"] += 1
+            stats["bytes"] += size
+            stats["changed"].append(path)
+        else:
+            stats["unchanged"] += 1
+
+    start = None
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        try:
+            for path, data in outputs:
+                if slots.locked():
+                    wait = time.perf_counter()
+                    await slots.acquire()
+                    stats["waited"] += time.perf_counter() - wait
+                else:
+                    await slots.acquire()
+                if errors:
+                    slots.release()
+                    break
+                if start is None:
+                    start = time.perf_counter()
+                # submitted right away, the thread starts writing while the next page is rendered
+                future = loop.run_in_executor(executor, write_file, path, data, known.get(path))
+                future.add_done_callback(lambda future, path=path, size=len(data): done(future, path, size))
+                futures.append(future)
+        finally:
+            wait = time.perf_counter()
+            await asyncio.gather(*futures, return_exceptions=True)
+            stats["waited"] += time.perf_counter() - wait
+    if errors:
+        raise errors[0]
+    stats["files"] = len(futures)
+    if start is not None:
+        stats["seconds"] = time.perf_counter() - start
+    return stats
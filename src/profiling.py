@@ -0,0 +1,224 @@
+import functools
+import os
+import sys
+import threading
+import time
+from html_node import HTMLNode, ParentNode
+import assets
+import output
+import md_to_blocks
+import md_to_text_node
+
+"""
+Opt-in instrumentation of the build: wall time, call counts and bytes for each stage, overall and per page.
+Nothing is instrumented until enable() is called. It replaces the function of each stage (see STAGES)
+with a timed wrapper in every module that imported it, and disable() puts the originals back,
+so a build without --profile runs exactly the code it ran before.
+Stages nest: "block nodes" includes the "classify" and "inline" time of the block, "page" includes everything
+but "write", which happens on the threads of the output stage while the next pages are rendered.
+"""
+
+def size_of_first(args, result):
+    return len(args[0])
+
+def size_of_result(args, result):
+    return len(result)
+
+def size_of_file(path):
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+class CountingWriter:
+    """ Passes the writes on to fp, counting the characters written """
+    def __init__(self, fp):
+        self.fp = fp
+        self.count = 0
+
+    def write(self, s):
+        self.count += len(s)
+        return self.fp.write(s)
+
+# (stage, owner, attribute, bytes(args, result) or None), iter marks a generator: one call per item,
+# CountingWriter a method writing to the file object it gets first: the bytes are the characters written
+STAGES = (
+    ("blocks", md_to_blocks, "iter_blocks", iter),
+    ("blocks", md_to_blocks, "iter_mmap_blocks", iter),
+    ("classify", md_to_blocks, "block_to_block_type", size_of_first),
+    ("inline", md_to_text_node, "text_to_text_node", size_of_first),
+    ("block nodes", md_to_blocks, "block_to_html_node", size_of_first),
+    ("render", ParentNode, "to_html", size_of_result),
+    ("render", HTMLNode, "write_html", CountingWriter),
+    ("hash", assets, "file_hash", lambda args, result: size_of_file(args[0])),
+    ("copy", assets, "publish_file", lambda args, result: size_of_file(args[1])),
+    ("write", output, "write_file", lambda args, result: len(args[1]) if result[0] else 0),
+)
+# modules that may hold their own reference to a stage function (from x import y)
+PATCHED_MODULES = ("md_to_blocks", "md_to_text_node", "inline_cache", "assets", "output", "build", "watch")
+
+# the Profiler of this process, None when profiling is off
+active = None
+# (owner, attribute, original) of everything enable() replaced
+originals = []
+
+
+def new_stats():
+    return {"calls": 0, "seconds": 0.0, "bytes": 0}
+
+
+def add_stats(stats, calls, seconds, nbytes):
+    stats["calls"] += calls
+    stats["seconds"] += seconds
+    stats["bytes"] += nbytes
+
+
+class Profiler:
+    """
+    Accumulates {stage: {"calls", "seconds", "bytes"}} for the whole process, and the same per page
+    for the page being measured (see measure_page). Recording is thread safe, asset copies and page writes
+    run on threads. Only the thread measuring the page adds to its stages, the writes on the other threads
+    belong to earlier pages.
+    """
+    def __init__(self):
+        self.pid = os.getpid()
+        self.stages = {}
+        self.pages = {}
+        self.page = None
+        self.page_thread = None
+        self.lock = threading.Lock()
+
+    def record(self, stage, seconds, nbytes=0, calls=1):
+        with self.lock:
+            add_stats(self.stages.setdefault(stage, new_stats()), calls, seconds, nbytes)
+            if self.page is not None and threading.get_ident() == self.page_thread:
+                add_stats(self.page["stages"].setdefault(stage, new_stats()), calls, seconds, nbytes)
+
+    def measure_page(self, rel, fn, *args, size=len):
+        """
+        Calls fn(*args) and records it as page rel, size(what fn returned) being the bytes of the page.
+        Returns what fn returned.
+        """
+        self.page = {"seconds": 0.0, "bytes": 0, "stages": {}}
+        self.page_thread = threading.get_ident()
+        start = time.perf_counter()
+        try:
+            result = fn(*args)
+        finally:
+            page, self.page = self.page, None
+        page["seconds"] = time.perf_counter() - start
+        page["bytes"] = size(result)
+        self.pages[rel] = page
+        self.record("page", page["seconds"], page["bytes"])
+        return result
+
+    def take(self) -> dict:
+        """ Returns {"stages", "pages"} recorded so far and starts over, for sending to another process """
+        with self.lock:
+            data = {"stages": self.stages, "pages": self.pages}
+            self.stages = {}
+            self.pages = {}
+        return data
+
+    def merge(self, data):
+        """ Adds what another Profiler took (see take) """
+        with self.lock:
+            for stage, stats in data["stages"].items():
+                add_stats(self.stages.setdefault(stage, new_stats()), stats["calls"], stats["seconds"], stats["bytes"])
+            self.pages.update(data["pages"])
+
+    def to_dict(self) -> dict:
+        with self.lock:
+            return {"stages": dict(self.stages), "pages": dict(self.pages)}
+
+
+def timed(stage, fn, measure):
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        result = fn(*args, **kwargs)
+        active.record(stage, time.perf_counter() - start, measure(args, result) if measure else 0)
+        return result
+    return wrapper
+
+
+def timed_iter(stage, fn):
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        # the work of a generator happens in next(), each item counts as a call
+        items = iter(fn(*args, **kwargs))
+        while True:
+            start = time.perf_counter()
+            item = next(items, None)
+            if item is None:
+                active.record(stage, time.perf_counter() - start, calls=0)
+                return
+            active.record(stage, time.perf_counter() - start, len(item))
+            yield item
+    return wrapper
+
+
+def timed_writes(stage, fn):
+    @functools.wraps(fn)
+    def wrapper(self, fp, *args, **kwargs):
+        writer = CountingWriter(fp)
+        start = time.perf_counter()
+        result = fn(self, writer, *args, **kwargs)
+        active.record(stage, time.perf_counter() - start, writer.count)
+        return result
+    return wrapper
+
+
+def instrument(stage, fn, measure):
+    """ The timed wrapper of fn for its kind of measure, see STAGES """
+    if measure is iter:
+        return timed_iter(stage, fn)
+    if measure is CountingWriter:
+        return timed_writes(stage, fn)
+    return timed(stage, fn, measure)
+
+
+def enable() -> Profiler:
+    """
+    Turns profiling on in this process and returns its Profiler.
+    A process forked from a profiled one gets a fresh Profiler, not a copy of its parent's numbers.
+    """
+    global active
+    if active is not None and active.pid == os.getpid():
+        return active
+    if not originals:
+        modules = [sys.modules[name] for name in PATCHED_MODULES if name in sys.modules]
+        for stage, owner, attribute, measure in STAGES:
+            original = getattr(owner, attribute)
+            wrapper = instrument(stage, original, measure)
+            for target in [owner] + modules:
+                if getattr(target, attribute, None) is original:
+                    originals.append((target, attribute, original))
+                    setattr(target, attribute, wrapper)
+    active = Profiler()
+    return active
+
+
+def disable():
+    """ Puts every instrumented function back. Returns the Profiler that was active, if any """
+    global active
+    for target, attribute, original in reversed(originals):
+        setattr(target, attribute, original)
+    originals.clear()
+    profiler, active = active, None
+    return profiler
+
+
+def format_profile(data, top=10) -> str:
+    """ The stages by total time, then the top slowest pages with their time per stage (ms) """
+    lines = ["stages:"]
+    for stage, stats in sorted(data["stages"].items(), key=lambda item: -item[1]["seconds"]):
+        lines.append(f"  {stage:<12} {stats['seconds']:9.3f}s  {stats['calls']:9d} calls  {stats['bytes']:12d} bytes")
+    pages = sorted(data["pages"].items(), key=lambda item: -item[1]["seconds"])[:top]
+    if pages:
+        lines.append(f"slowest {len(pages)} pages:")
+    for rel, page in pages:
+        stages = sorted(page["stages"].items(), key=lambda item: -item[1]["seconds"])
+        detail = ", ".join(f"{stage} {stats['seconds'] * 1000:.1f}" for stage, stats in stages)
+        lines.append(f"  {page['seconds'] * 1000:9.1f} ms  {rel} ({page['bytes']} bytes) {detail}")
+    return "\n".join(lines)
@@ -0,0 +1,92 @@
+from html_node import HTMLNode
+
+"""
+Render plans, for trees that are rendered over and over (preview server, output variants...).
+compile_plan walks a tree once and keeps its html as a flat list of static segments, with a hole
+for every Slot node in it. Rendering the plan again is then filling the holes and one "".join,
+with no tree walk, no method dispatch and no attribute rendering.
+"""
+
+class Slot(HTMLNode):
+    """
+    A named hole in a tree, filled when a RenderPlan of the tree is rendered.
+    The same name can be used more than once, every place gets the same value.
+    A tree with a Slot can only be rendered through a plan.
+    """
+    __slots__ = ()
+
+    def __init__(self, name):
+        super().__init__(value=name)
+
+    def to_html(self):
+        raise ValueError(f"Slot {self.value} can only be rendered by a RenderPlan")
+
+    def render_into(self, buf):
+        if not isinstance(buf, PlanBuilder):
+            self.to_html()
+        buf.slot(self.value)
+
+    def __repr__(self):
+        return f"Slot({self.value})"
+
+
+class PlanBuilder:
+    """ Stands in for the list given to render_into, merging consecutive strings into one segment """
+    def __init__(self):
+        self.segments = []
+        self.slots = {}
+        self.parts = []
+
+    def append(self, s):
+        self.parts.append(s)
+
+    def slot(self, name):
+        self.segments.append("".join(self.parts))
+        self.parts = []
+        self.slots.setdefault(name, []).append(len(self.segments))
+        self.segments.append("")
+
+    def plan(self):
+        self.segments.append("".join(self.parts))
+        self.parts = []
+        return RenderPlan(self.segments, self.slots)
+
+
+class RenderPlan:
+    """
+    segments - the html of the tree, with "" where the slots go
+    slots - {slot name: indexes of its segments}
+    """
+    __slots__ = ("segments", "slots")
+
+    def __init__(self, segments, slots):
+        self.segments = segments
+        self.slots = slots
+
+    def render(self, **values) -> str:
+        """
+        The html of the tree with every slot filled from values: a string (used as is, like the value of
+        a LeafNode without tag) or an HTMLNode (rendered). Raises ValueError when a slot has no value.
+        """
+        if not self.slots:
+            return self.segments[0]
+        parts = self.segments.copy()
+        for name, indexes in self.slots.items():
+            if name not in values:
+                raise ValueError(f"No value for slot {name}")
+            value = values[name]
+            if isinstance(value, HTMLNode):
+                value = value.to_html()
+            for i in indexes:
+                parts[i] = value
+        return "".join(parts)
+
+    def __repr__(self):
+        return f"RenderPlan({len(self.segments)} segments, slots {sorted(self.slots)})"
+
+
+def compile_plan(node) -> RenderPlan:
+    """ Renders node once into a RenderPlan. Later changes to the tree don't show in the plan """
+    builder = PlanBuilder()
+    node.render_into(builder)
+    return builder.plan()
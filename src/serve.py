@@ -0,0 +1,264 @@
+import hashlib
+import os
+import posixpath
+import threading
+from collections import OrderedDict
+from functools import partial
+from http import HTTPStatus
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote, urlsplit
+from assets import file_hash
+from build import load_template, extract_title, TITLE_MARKER
+from md_to_blocks import markdown_to_html_node
+from watch import file_signature
+
+"""
+Dev server: previews the site without building public/.
+A page is rendered from its markdown when it is requested, and kept in an LRU cache until its
+source or the template changes. Responses carry an ETag (hash of the html), a request with a
+matching If-None-Match gets a 304 without the page being rendered or sent again.
+Everything that isn't a page is served from static/ directly, by SimpleHTTPRequestHandler.
+    /                -> content/index.md
+    /blog/           -> content/blog/index.md
+    /blog/post.html  -> content/blog/post.md (so are /blog/post and /blog/post/)
+"""
+
+DEFAULT_PAGE_CACHE = 64 * 1024 * 1024
+
+
+class Page:
+    # template_signature: the signature of the template the page was rendered with
+    __slots__ = ("signature", "source_hash", "etag", "body", "template_signature")
+
+    def __init__(self, signature, source_hash, etag, body, template_signature=None):
+        self.signature = signature
+        self.source_hash = source_hash
+        self.etag = etag
+        self.body = body
+        self.template_signature = template_signature
+
+
+class PageCache:
+    """
+    LRU cache {relative source path: Page}, bounded by the size of the rendered pages.
+    Counts hits, misses (renders) and evictions. Thread safe, requests are served on threads.
+    """
+    def __init__(self, max_bytes=DEFAULT_PAGE_CACHE):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+
+    def get(self, rel):
+        with self.lock:
+            page = self.entries.get(rel)
+            if page is not None:
+                self.entries.move_to_end(rel)
+            return page
+
+    def put(self, rel, page):
+        with self.lock:
+            old = self.entries.pop(rel, None)
+            if old is not None:
+                self.bytes -= len(old.body)
+            if len(page.body) > self.max_bytes:
+                return
+            self.entries[rel] = page
+            self.bytes += len(page.body)
+            while self.bytes > self.max_bytes:
+                _, evicted = self.entries.popitem(last=False)
+                self.bytes -= len(evicted.body)
+                self.evictions += 1
+
+    def count(self, hit):
+        with self.lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.bytes = 0
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self.entries),
+                "bytes": self.bytes,
+            }
+
+
+class DevSite:
+    """ The pages of content_dir rendered on demand, inside the template if there is one """
+    def __init__(self, static_dir, content_dir, template_path=None, cache_bytes=DEFAULT_PAGE_CACHE):
+        self.static_dir = static_dir
+        self.content_dir = content_dir
+        self.template_path = template_path
+        self.cache = PageCache(cache_bytes)
+        self.template = None
+        self.template_signature = None
+        self.lock = threading.Lock()
+
+    def source(self, url_path):
+        """ The relative path of the markdown page for url_path, None when it isn't a page """
+        path = posixpath.normpath(unquote(url_path))
+        if ".." in path.split("/"):
+            return None
+        path = path.strip("/")
+        if path in ("", "."):
+            candidates = ["index.md"]
+        elif url_path.endswith("/"):
+            candidates = [path + "/index.md", path + ".md"]
+        elif path.endswith(".html"):
+            candidates = [path[:-len(".html")] + ".md"]
+        elif "." in posixpath.basename(path):
+            return None
+        else:
+            candidates = [path + ".md", path + "/index.md"]
+        for rel in candidates:
+            if os.path.isfile(os.path.join(self.content_dir, rel)):
+                return rel
+        return None
+
+    def check_template(self) -> tuple:
+        """
+        Reloads the template when it changed, every cached page is then stale.
+        Returns (template, its signature), read together: a page is rendered with the template it records.
+        """
+        if self.template_path is None:
+            return None, None
+        signature = file_signature(self.template_path)
+        with self.lock:
+            if signature != self.template_signature:
+                self.template = load_template(self.template_path)
+                self.template_signature = signature
+                self.cache.clear()
+            return self.template, self.template_signature
+
+    def page(self, rel) -> Page:
+        """
+        The rendered page, from the cache when its source has the same mtime and size as when it
+        was rendered, or the same content hash (touched but unchanged).
+        A cached page rendered with another template is a miss: a request that was rendering while the
+        template changed may put its page back after the cache was cleared.
+        """
+        template, template_signature = self.check_template()
+        src_path = os.path.join(self.content_dir, rel)
+        signature = file_signature(src_path)
+        page = self.cache.get(rel)
+        if page is not None and page.template_signature != template_signature:
+            page = None
+        if page is not None and page.signature == signature:
+            self.cache.count(hit=True)
+            return page
+        source_hash = file_hash(src_path)
+        if page is not None and page.source_hash == source_hash:
+            self.cache.count(hit=True)
+            page = Page(signature, source_hash, page.etag, page.body, template_signature)
+        else:
+            self.cache.count(hit=False)
+            page = self.render(src_path, signature, source_hash, template, template_signature)
+        self.cache.put(rel, page)
+        return page
+
+    def render(self, src_path, signature, source_hash, template=None, template_signature=None) -> Page:
+        with open(src_path, encoding="utf-8") as f:
+            doc = f.read()
+        html = markdown_to_html_node(doc).to_html()
+        if template:
+            title = extract_title(doc)
+            html = template[0].replace(TITLE_MARKER, title) + html + template[1].replace(TITLE_MARKER, title)
+        body = html.encode("utf-8")
+        etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+        return Page(signature, source_hash, etag, body, template_signature)
+
+
+class DevRequestHandler(SimpleHTTPRequestHandler):
+    """ Pages from the DevSite, everything else from its static directory """
+    # keep-alive, every response with a body has a Content-Length
+    protocol_version = "HTTP/1.1"
+    # headers and body are separate writes, with Nagle the body waits for the client's delayed ACK (~40ms)
+    disable_nagle_algorithm = True
+
+    def __init__(self, *args, site, log=None, **kwargs):
+        self.site = site
+        self.log = log
+        super().__init__(*args, directory=site.static_dir, **kwargs)
+
+    def do_GET(self):
+        if not self.send_page(head=False):
+            super().do_GET()
+
+    def do_HEAD(self):
+        if not self.send_page(head=True):
+            super().do_HEAD()
+
+    def send_page(self, head) -> bool:
+        """ Answers the request if it is for a page. Returns False to let static/ answer it """
+        rel = self.site.source(urlsplit(self.path).path)
+        if rel is None:
+            return False
+        try:
+            page = self.site.page(rel)
+        except FileNotFoundError:
+            # deleted since source() found it
+            return False
+        except Exception as e:
+            self.send_error(HTTPStatus.INTERNAL_SERVER_ERROR, f"{rel}: {e}")
+            return True
+        if page.etag in self.headers.get("If-None-Match", ""):
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            # no Content-Length: it would have to be the one of the page, and a 304 has no body anyway
+            self.send_header("ETag", page.etag)
+            self.end_headers()
+            return True
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(page.body)))
+        self.send_header("ETag", page.etag)
+        # always ask again, the ETag makes that cheap
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        if not head:
+            self.wfile.write(page.body)
+        return True
+
+    def log_message(self, format, *args):
+        if self.log is not None:
+            self.log(f"{self.address_string()} {format % args}")
+
+
+class DevServer(ThreadingHTTPServer):
+    # the default listen backlog of 5 drops connections when a browser opens a few at once,
+    # and a dropped SYN is only retried after a second
+    request_queue_size = 128
+
+
+def make_server(static_dir, content_dir, template_path=None, host="127.0.0.1", port=8000,
+                cache_bytes=DEFAULT_PAGE_CACHE, log=None) -> DevServer:
+    """ A dev server ready to serve_forever(). Port 0 picks a free port, see server.server_address """
+    site = DevSite(static_dir, content_dir, template_path, cache_bytes)
+    server = DevServer((host, port), partial(DevRequestHandler, site=site, log=log))
+    server.site = site
+    return server
+
+
+def serve(static_dir, content_dir, template_path=None, host="127.0.0.1", port=8000, cache_bytes=DEFAULT_PAGE_CACHE,
+          log=print):
+    server = make_server(static_dir, content_dir, template_path, host, port, cache_bytes, log)
+    host, port = server.server_address[:2]
+    log(f"serving {content_dir} and {static_dir} on http://{host}:{port}/ (ctrl-c to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
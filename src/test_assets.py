@@ -0,0 +1,236 @@
+import os
+import unittest
+from unittest import mock
+from testutil import TempDirTestCase, write, read
+from assets import *
+
+
+class TestCopyFiles(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.src = os.path.join(self.tmp.name, "static")
+        self.dst = os.path.join(self.tmp.name, "public")
+        write(os.path.join(self.src, "index.css"), "body {}")
+        write(os.path.join(self.src, "images", "a.png"), "png")
+
+    def test_copy_files(self):
+        write(os.path.join(self.dst, "stale.html"), "old")
+        self.assertEqual(copy_files(self.src, self.dst), 2)
+        self.assertEqual(read(os.path.join(self.dst, "images", "a.png")), "png")
+        self.assertFalse(os.path.exists(os.path.join(self.dst, "stale.html")))
+
+
+class TestParallelCopyFiles(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.src = os.path.join(self.tmp.name, "static")
+        for i in range(20):
+            write(os.path.join(self.src, f"d{i % 3}", "nested", f"f{i}.txt"), f"file {i}")
+        write(os.path.join(self.src, "index.css"), "body {}")
+        os.makedirs(os.path.join(self.src, "empty"))
+
+    def snapshot(self, root):
+        tree = {}
+        for directory, dirs, files in os.walk(root):
+            rel = os.path.relpath(directory, root)
+            tree[rel] = sorted(files)
+            for name in files:
+                tree[os.path.join(rel, name)] = read(os.path.join(directory, name))
+        return tree
+
+    def test_matches_serial_copy(self):
+        serial = os.path.join(self.tmp.name, "serial")
+        parallel = os.path.join(self.tmp.name, "parallel")
+        self.assertEqual(copy_files(self.src, serial), 21)
+        self.assertEqual(parallel_copy_files(self.src, parallel, jobs=4), 21)
+        self.assertEqual(self.snapshot(serial), self.snapshot(parallel))
+
+    def test_single_job(self):
+        dst = os.path.join(self.tmp.name, "public")
+        write(os.path.join(dst, "stale.html"), "old")
+        self.assertEqual(parallel_copy_files(self.src, dst, jobs=1), 21)
+        self.assertFalse(os.path.exists(os.path.join(dst, "stale.html")))
+        self.assertTrue(os.path.isdir(os.path.join(dst, "empty")))
+
+    def test_scan_tree(self):
+        dirs, files = scan_tree(self.src)
+        self.assertIn("d0/nested", dirs)
+        self.assertLess(dirs.index("d0"), dirs.index("d0/nested"))
+        self.assertEqual(files["index.css"].st_size, 7)
+        self.assertEqual(len(files), 21)
+
+    def test_copy_error_is_raised(self):
+        dst = os.path.join(self.tmp.name, "public")
+        with self.assertRaises(FileNotFoundError):
+            copy_many([(os.path.join(self.src, "missing"), dst), (os.path.join(self.src, "missing2"), dst)], jobs=2)
+
+
+class TestPublishFile(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.src = os.path.join(self.tmp.name, "tolkien.png")
+        self.dst = os.path.join(self.tmp.name, "public.png")
+        write(self.src, "x" * 100000)
+
+    def test_every_mode_publishes_the_content(self):
+        for mode in PUBLISH_MODES:
+            self.assertEqual(publish_file(self.src, self.dst, mode), mode)
+            self.assertEqual(read(self.dst), "x" * 100000)
+
+    def test_hardlink(self):
+        publish_file(self.src, self.dst, "hardlink")
+        self.assertTrue(os.path.samefile(self.src, self.dst))
+        self.assertFalse(os.path.islink(self.dst))
+
+    def test_symlink(self):
+        publish_file(self.src, self.dst, "symlink")
+        self.assertTrue(os.path.islink(self.dst))
+
+    def test_copy_over_link_leaves_source_alone(self):
+        publish_file(self.src, self.dst, "hardlink")
+        other = os.path.join(self.tmp.name, "other.png")
+        write(other, "other")
+        publish_file(other, self.dst, "copy")
+        self.assertEqual(read(self.dst), "other")
+        self.assertEqual(read(self.src), "x" * 100000)
+
+    def test_fallback_to_copy(self):
+        with mock.patch("os.link", side_effect=OSError(18, "Invalid cross-device link")):
+            self.assertEqual(publish_file(self.src, self.dst, "hardlink"), "copy")
+        self.assertFalse(os.path.samefile(self.src, self.dst))
+        self.assertEqual(read(self.dst), "x" * 100000)
+
+    def test_kernel_fallback_to_copy(self):
+        with mock.patch("assets.kernel_copy", side_effect=OSError(38, "Function not implemented")):
+            self.assertEqual(publish_file(self.src, self.dst, "kernel"), "copy")
+        self.assertEqual(read(self.dst), "x" * 100000)
+
+    def test_unknown_mode(self):
+        with self.assertRaises(ValueError):
+            publish_file(self.src, self.dst, "teleport")
+
+    def test_parallel_copy_with_mode(self):
+        src = os.path.join(self.tmp.name, "static")
+        dst = os.path.join(self.tmp.name, "public")
+        write(os.path.join(src, "images", "a.png"), "png")
+        self.assertEqual(parallel_copy_files(src, dst, jobs=2, mode="symlink"), 1)
+        self.assertTrue(os.path.islink(os.path.join(dst, "images", "a.png")))
+
+
+class TestSyncFiles(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.src = os.path.join(self.tmp.name, "static")
+        self.dst = os.path.join(self.tmp.name, "public")
+        self.manifest = os.path.join(self.tmp.name, ".cache", "manifest.json")
+        write(os.path.join(self.src, "index.css"), "body {}")
+        write(os.path.join(self.src, "images", "a.png"), "png")
+
+    def sync(self):
+        return sync_files(self.src, self.dst, self.manifest)
+
+    def test_first_sync_copies_everything(self):
+        self.assertEqual(self.sync(), {"copied": 2, "skipped": 0, "removed": 0})
+        self.assertEqual(read(os.path.join(self.dst, "index.css")), "body {}")
+        self.assertEqual(read(os.path.join(self.dst, "images", "a.png")), "png")
+
+    def test_second_sync_skips_everything(self):
+        self.sync()
+        self.assertEqual(self.sync(), {"copied": 0, "skipped": 2, "removed": 0})
+
+    def test_changed_file_is_copied(self):
+        self.sync()
+        write(os.path.join(self.src, "index.css"), "body { color: red }")
+        self.assertEqual(self.sync(), {"copied": 1, "skipped": 1, "removed": 0})
+        self.assertEqual(read(os.path.join(self.dst, "index.css")), "body { color: red }")
+
+    def test_touched_file_is_skipped(self):
+        self.sync()
+        path = os.path.join(self.src, "index.css")
+        st = os.stat(path)
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+        self.assertEqual(self.sync(), {"copied": 0, "skipped": 2, "removed": 0})
+
+    def test_deleted_source_is_removed(self):
+        self.sync()
+        os.remove(os.path.join(self.src, "images", "a.png"))
+        self.assertEqual(self.sync(), {"copied": 0, "skipped": 1, "removed": 1})
+        self.assertFalse(os.path.exists(os.path.join(self.dst, "images")))
+
+    def test_deleted_source_of_symlink_is_removed(self):
+        sync_files(self.src, self.dst, self.manifest, mode="symlink")
+        os.remove(os.path.join(self.src, "images", "a.png"))
+        self.assertEqual(sync_files(self.src, self.dst, self.manifest, mode="symlink"),
+                         {"copied": 0, "skipped": 1, "removed": 1})
+        self.assertFalse(os.path.lexists(os.path.join(self.dst, "images", "a.png")))
+        self.assertFalse(os.path.exists(os.path.join(self.dst, "images")))
+
+    def test_mode_change_publishes_again(self):
+        css = os.path.join(self.dst, "index.css")
+        sync_files(self.src, self.dst, self.manifest, mode="symlink")
+        self.assertEqual(sync_files(self.src, self.dst, self.manifest, mode="copy"),
+                         {"copied": 2, "skipped": 0, "removed": 0})
+        self.assertFalse(os.path.islink(css))
+        self.assertEqual(read(css), "body {}")
+        sync_files(self.src, self.dst, self.manifest, mode="hardlink")
+        self.assertTrue(os.path.samefile(css, os.path.join(self.src, "index.css")))
+        sync_files(self.src, self.dst, self.manifest, mode="copy")
+        self.assertFalse(os.path.samefile(css, os.path.join(self.src, "index.css")))
+        self.assertEqual(sync_files(self.src, self.dst, self.manifest, mode="copy")["skipped"], 2)
+
+    def test_lost_manifest_republishes_links(self):
+        sync_files(self.src, self.dst, self.manifest, mode="symlink")
+        os.remove(self.manifest)
+        self.assertEqual(self.sync(), {"copied": 2, "skipped": 0, "removed": 0})
+        self.assertFalse(os.path.islink(os.path.join(self.dst, "index.css")))
+
+    def test_missing_output_is_copied_again(self):
+        self.sync()
+        os.remove(os.path.join(self.dst, "index.css"))
+        self.assertEqual(self.sync(), {"copied": 1, "skipped": 1, "removed": 0})
+
+    def test_unrelated_outputs_are_kept(self):
+        write(os.path.join(self.dst, "index.html"), "<div></div>")
+        self.sync()
+        self.sync()
+        self.assertTrue(os.path.exists(os.path.join(self.dst, "index.html")))
+
+    def test_changed_paths(self):
+        changed = []
+        sync_files(self.src, self.dst, self.manifest, changed=changed)
+        self.assertEqual(sorted(changed), ["images/a.png", "index.css"])
+        write(os.path.join(self.src, "index.css"), "body { color: red }")
+        os.remove(os.path.join(self.src, "images", "a.png"))
+        changed = []
+        sync_files(self.src, self.dst, self.manifest, changed=changed)
+        self.assertEqual(sorted(changed), ["images/a.png", "index.css"])
+
+    def test_lost_manifest_keeps_same_outputs(self):
+        self.sync()
+        os.remove(self.manifest)
+        write(os.path.join(self.src, "index.css"), "body { color: red }")
+        png = os.path.join(self.dst, "images", "a.png")
+        os.utime(png, ns=(0, 0))
+        self.assertEqual(self.sync(), {"copied": 1, "skipped": 1, "removed": 0})
+        self.assertEqual(os.stat(png).st_mtime_ns, 0)
+        self.assertEqual(read(os.path.join(self.dst, "index.css")), "body { color: red }")
+
+    def test_corrupt_manifest_falls_back_to_copy(self):
+        write(self.manifest, "not json")
+        self.assertEqual(self.sync(), {"copied": 2, "skipped": 0, "removed": 0})
+
+
+class TestSaveText(TempDirTestCase):
+    def test_save_json_and_paths(self):
+        path = os.path.join(self.tmp.name, ".cache", "report.json")
+        save_json(path, {"b": 1, "a": [2]})
+        self.assertEqual(load_json(path), {"a": [2], "b": 1})
+        changed = os.path.join(self.tmp.name, "changed.txt")
+        save_paths(changed, ["index.css", "images/a.png"])
+        self.assertEqual(read(changed), "index.css\nimages/a.png\n")
+        self.assertEqual(sorted(os.listdir(self.tmp.name)), [".cache", "changed.txt"])
+        self.assertEqual(os.listdir(os.path.dirname(path)), ["report.json"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,228 @@
+import os
+import unittest
+from unittest import mock
+from testutil import TempDirTestCase, write, read
+from assets import load_manifest, save_manifest
+from build import *
+
+
+class TestBuildPages(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.content = os.path.join(self.tmp.name, "content")
+        self.public = os.path.join(self.tmp.name, "public")
+        write(os.path.join(self.content, "index.md"), "# Home\n\nWelcome **home**")
+        for i in range(12):
+            write(os.path.join(self.content, "blog", f"post{i}.md"), f"# Post {i}\n\n- item *{i}*\n- other")
+        write(os.path.join(self.content, "notes.txt"), "not a page")
+
+    def test_find_pages(self):
+        pages = find_pages(self.content)
+        self.assertEqual(len(pages), 13)
+        self.assertEqual(pages, sorted(pages))
+        self.assertIn("blog/post3.md", pages)
+        self.assertEqual(find_pages(os.path.join(self.tmp.name, "missing")), [])
+
+    def test_output_path(self):
+        self.assertEqual(output_path("blog/post.md"), "blog/post.html")
+
+    def test_extract_title(self):
+        self.assertEqual(extract_title("intro\n\n# The Title \n\n## sub"), "The Title")
+        self.assertEqual(extract_title("no heading"), "")
+
+    def test_serial_build(self):
+        report = build_pages(self.content, self.public, jobs=1)
+        self.assertEqual(report["pages"], 13)
+        self.assertEqual(read(os.path.join(self.public, "index.html")), "<div><h1>Home</h1><p>Welcome <b>home</b></p></div>")
+        self.assertEqual(sum(w["pages"] for w in report["workers"]), 13)
+        self.assertFalse(os.path.exists(os.path.join(self.public, "notes.html")))
+
+    def test_parallel_build_matches_serial(self):
+        serial = os.path.join(self.tmp.name, "serial")
+        build_pages(self.content, serial, jobs=1)
+        report = build_pages(self.content, self.public, jobs=2, chunk_size=3)
+        self.assertEqual(report["chunks"], 5)
+        self.assertEqual(sum(w["chunks"] for w in report["workers"]), 5)
+        for rel in find_pages(self.content):
+            out = output_path(rel)
+            self.assertEqual(read(os.path.join(self.public, out)), read(os.path.join(serial, out)))
+
+    def test_inline_cache(self):
+        serial = os.path.join(self.tmp.name, "serial")
+        build_pages(self.content, serial, jobs=1)
+        report = build_pages(self.content, self.public, jobs=1, inline_cache_bytes=1024 * 1024)
+        self.assertEqual(report["workers"][0]["inline_hits"], 11)
+        self.assertEqual(read(os.path.join(self.public, "blog", "post5.html")), read(os.path.join(serial, "blog", "post5.html")))
+        self.assertIn("inline cache: 11 hits", format_report(report))
+
+    def test_mmap_build_matches(self):
+        serial = os.path.join(self.tmp.name, "serial")
+        build_pages(self.content, serial, jobs=1)
+        with mock.patch("build.MMAP_THRESHOLD", 0):
+            build_pages(self.content, self.public, jobs=1)
+        for rel in find_pages(self.content):
+            out = output_path(rel)
+            self.assertEqual(read(os.path.join(self.public, out)), read(os.path.join(serial, out)))
+
+    def test_template(self):
+        template = os.path.join(self.tmp.name, "template.html")
+        write(template, "<title>{{ Title }}</title><body>{{ Content }}</body>")
+        build_pages(self.content, self.public, jobs=1, template_path=template)
+        self.assertEqual(
+            read(os.path.join(self.public, "blog", "post1.html")),
+            "<title>Post 1</title><body><div><h1>Post 1</h1><ul><li>item <i>1</i></li><li>other</li></ul></div></body>",
+        )
+
+    def test_template_without_content(self):
+        template = os.path.join(self.tmp.name, "template.html")
+        write(template, "<body></body>")
+        with self.assertRaises(ValueError):
+            build_pages(self.content, self.public, jobs=1, template_path=template)
+
+    def test_unchanged_outputs_are_not_rewritten(self):
+        build_pages(self.content, self.public, jobs=1)
+        index = os.path.join(self.public, "index.html")
+        os.utime(index, ns=(0, 0))
+        write(os.path.join(self.content, "blog", "post3.md"), "# Post 3\n\nedited")
+        report = build_pages(self.content, self.public, jobs=2, chunk_size=3)
+        self.assertEqual(os.stat(index).st_mtime_ns, 0)
+        output = report["output"]
+        self.assertEqual((output["files"], output["written"], output["unchanged"]), (13, 1, 12))
+        self.assertEqual(read(os.path.join(self.public, "blog", "post3.html")), "<div><h1>Post 3</h1><p>edited</p></div>")
+        self.assertIn("output: 1 written, 12 unchanged", format_report(report))
+
+    def test_write_page_is_atomic(self):
+        dst = os.path.join(self.public, "index.html")
+        write(dst, "old")
+        with mock.patch("build.md_to_blocks.block_to_html_node", side_effect=ValueError("broken")):
+            with self.assertRaises(ValueError):
+                write_page(os.path.join(self.content, "index.md"), dst)
+        self.assertEqual(read(dst), "old")
+        self.assertEqual(os.listdir(self.public), ["index.html"])
+
+    def test_error_names_the_page(self):
+        write(os.path.join(self.content, "broken.md"), "an **unmatched delimiter")
+        with self.assertRaisesRegex(Exception, "broken.md"):
+            build_pages(self.content, self.public, jobs=2)
+
+
+class TestBuildCache(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.content = os.path.join(self.tmp.name, "content")
+        self.public = os.path.join(self.tmp.name, "public")
+        self.cache = os.path.join(self.tmp.name, ".cache", "build.json")
+        self.template = os.path.join(self.tmp.name, "template.html")
+        write(self.template, "<body>{{ Content }}</body>")
+        for i in range(5):
+            write(os.path.join(self.content, "blog", f"post{i}.md"), f"post *{i}*")
+
+    def build(self):
+        report = build_pages(self.content, self.public, jobs=1, template_path=self.template, cache_path=self.cache)
+        return report["rendered"], report["skipped"], report["removed"]
+
+    def test_unchanged_pages_are_skipped(self):
+        self.assertEqual(self.build(), (5, 0, 0))
+        self.assertEqual(self.build(), (0, 5, 0))
+
+    def test_edited_page_is_rendered(self):
+        self.build()
+        write(os.path.join(self.content, "blog", "post2.md"), "edited **post**")
+        self.assertEqual(self.build(), (1, 4, 0))
+        self.assertEqual(read(os.path.join(self.public, "blog", "post2.html")), "<body><div><p>edited <b>post</b></p></div></body>")
+
+    def test_touched_page_is_skipped(self):
+        self.build()
+        path = os.path.join(self.content, "blog", "post2.md")
+        st = os.stat(path)
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+        self.assertEqual(self.build(), (0, 5, 0))
+
+    def test_template_change_renders_everything(self):
+        self.build()
+        write(self.template, "<main>{{ Content }}</main>")
+        self.assertEqual(self.build(), (5, 0, 0))
+        self.assertTrue(read(os.path.join(self.public, "blog", "post0.html")).startswith("<main>"))
+
+    def test_parser_change_renders_everything(self):
+        self.build()
+        cache = load_manifest(self.cache)
+        cache["stamp"] = "an older parser"
+        save_manifest(self.cache, cache)
+        self.assertEqual(self.build(), (5, 0, 0))
+
+    def test_stamp_follows_template(self):
+        stamp = build_stamp(self.template)
+        self.assertEqual(stamp, build_stamp(self.template))
+        self.assertNotEqual(stamp, build_stamp(None))
+
+    def test_deleted_page_is_removed(self):
+        self.build()
+        os.remove(os.path.join(self.content, "blog", "post4.md"))
+        self.assertEqual(self.build(), (0, 4, 1))
+        self.assertFalse(os.path.exists(os.path.join(self.public, "blog", "post4.html")))
+
+    def test_missing_output_is_rendered(self):
+        self.build()
+        os.remove(os.path.join(self.public, "blog", "post1.html"))
+        self.assertEqual(self.build(), (1, 4, 0))
+
+    def test_changed_outputs(self):
+        report = build_pages(self.content, self.public, jobs=1, template_path=self.template, cache_path=self.cache)
+        self.assertEqual(report["changed"], [f"blog/post{i}.html" for i in range(5)])
+        write(os.path.join(self.content, "blog", "post2.md"), "edited **post**")
+        os.remove(os.path.join(self.content, "blog", "post4.md"))
+        report = build_pages(self.content, self.public, jobs=1, template_path=self.template, cache_path=self.cache)
+        self.assertEqual(report["changed"], ["blog/post2.html", "blog/post4.html"])
+
+    def test_same_html_is_not_written(self):
+        self.build()
+        cache = load_manifest(self.cache)
+        self.assertEqual(sorted(cache["outputs"]), [f"blog/post{i}.html" for i in range(5)])
+        cache["stamp"] = "an older parser"
+        save_manifest(self.cache, cache)
+        post = os.path.join(self.public, "blog", "post0.html")
+        mtime = os.stat(post).st_mtime_ns
+        with mock.patch("output.same_content") as same_content:
+            report = build_pages(self.content, self.public, jobs=1, template_path=self.template, cache_path=self.cache)
+        # rendered again, but known to be the same html from the hashes of the last build
+        same_content.assert_not_called()
+        self.assertEqual((report["rendered"], report["output"]["unchanged"], report["changed"]), (5, 5, []))
+        self.assertEqual(os.stat(post).st_mtime_ns, mtime)
+
+    def test_output_written_by_someone_else_is_checked(self):
+        self.build()
+        cache = load_manifest(self.cache)
+        cache["stamp"] = "an older parser"
+        save_manifest(self.cache, cache)
+        # same size as the page, but not the page
+        post = os.path.join(self.public, "blog", "post0.html")
+        write(post, "x" * len(read(post)))
+        report = build_pages(self.content, self.public, jobs=1, template_path=self.template, cache_path=self.cache)
+        self.assertEqual(report["changed"], ["blog/post0.html"])
+        self.assertEqual(read(post), "<body><div><p>post <i>0</i></p></div></body>")
+
+    def test_streamed_page_with_same_html_is_not_written(self):
+        self.build()
+        cache = load_manifest(self.cache)
+        cache["stamp"] = "an older parser"
+        save_manifest(self.cache, cache)
+        write(os.path.join(self.content, "blog", "post1.md"), "edited")
+        with mock.patch("build.MMAP_THRESHOLD", 0):
+            report = build_pages(self.content, self.public, jobs=1, template_path=self.template, cache_path=self.cache)
+        self.assertEqual((report["output"]["files"], report["output"]["unchanged"]), (5, 4))
+        self.assertEqual(report["changed"], ["blog/post1.html"])
+        self.assertEqual(read(os.path.join(self.public, "blog", "post1.html")), "<body><div><p>edited</p></div></body>")
+        self.assertEqual(sorted(os.listdir(os.path.join(self.public, "blog"))), [f"post{i}.html" for i in range(5)])
+
+    def test_failed_build_keeps_old_cache(self):
+        self.build()
+        write(os.path.join(self.content, "blog", "post0.md"), "**broken")
+        with self.assertRaises(Exception):
+            self.build()
+        write(os.path.join(self.content, "blog", "post0.md"), "fixed")
+        self.assertEqual(self.build(), (1, 4, 0))
+
+
+if __name__ == "__main__":
+    unittest.main()
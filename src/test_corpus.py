@@ -0,0 +1,47 @@
+import os
+import tempfile
+import unittest
+from corpus import *
+from md_to_blocks import markdown_to_html_node, markdown_to_blocks, block_to_block_type, BlockType
+from md_to_text_node import text_to_text_node
+
+
+class TestCorpus(unittest.TestCase):
+    def test_reproducible(self):
+        self.assertEqual(generate_corpus(5, 20, seed=1), generate_corpus(5, 20, seed=1))
+        self.assertNotEqual(generate_corpus(5, 20, seed=1), generate_corpus(5, 20, seed=2))
+
+    def test_sizes(self):
+        corpus = generate_corpus(7, 12)
+        self.assertEqual(len(corpus), 7)
+        for doc in corpus.values():
+            self.assertEqual(len(markdown_to_blocks(doc)), 12)
+
+    def test_every_mix_parses(self):
+        for mix in MIXES:
+            corpus = generate_corpus(3, 30, mix)
+            for doc in corpus.values():
+                self.assertTrue(markdown_to_html_node(doc).to_html().startswith("<div><h1>"))
+            for text in inline_texts(corpus):
+                text_to_text_node(text)
+
+    def test_mix_is_followed(self):
+        corpus = generate_corpus(3, 30, {"code": 1})
+        for doc in corpus.values():
+            types = [block_to_block_type(block) for block in markdown_to_blocks(doc)]
+            self.assertEqual(types, [BlockType.HEADING] + [BlockType.CODEBLOCK] * 29)
+
+    def test_unknown_block_kind(self):
+        with self.assertRaises(ValueError):
+            generate_corpus(1, 3, {"table": 1})
+
+    def test_write_corpus(self):
+        corpus = generate_corpus(12, 3)
+        with tempfile.TemporaryDirectory() as tmp:
+            write_corpus(tmp, corpus)
+            with open(os.path.join(tmp, "section1", "page11.md"), encoding="utf-8") as f:
+                self.assertEqual(f.read(), corpus["section1/page11.md"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,4 +1,5 @@
 from html_node import *
+import io
 import unittest
 
 class TestHTMLNode(unittest.TestCase):
@@ -151,6 +152,157 @@ class TestHTMLNode(unittest.TestCase):
         expected_children = "".join([f"<span>child_{i}</span>" for i in range(10)])
         expected = f"<div>{expected_children}</div>"
         self.assertEqual(parent_node.to_html(), expected)
-        
+
+    def test_render_into_appends_to_buffer(self):
+        parent_node = ParentNode("p", [LeafNode("b", "bold"), LeafNode(None, " text")])
+        buf = ["<div>"]
+        parent_node.render_into(buf)
+        self.assertEqual("".join(buf), "<div><p><b>bold</b> text</p>")
+
+    def test_render_into_custom_node(self):
+        class Comment(HTMLNode):
+            def to_html(self):
+                return f"<!--{self.value}-->"
+        parent_node = ParentNode("div", [Comment(value="note"), LeafNode("span", "x")])
+        self.assertEqual(parent_node.to_html(), "<div><!--note--><span>x</span></div>")
+
+    def test_render_into_base_node_raises(self):
+        with self.assertRaises(NotImplementedError):
+            ParentNode("div", [HTMLNode()]).to_html()
+
+    def test_wide_and_deep_tree(self):
+        node = LeafNode("b", "x")
+        for _ in range(200):
+            node = ParentNode("span", [node, LeafNode(None, "y")])
+        expected = "<span>" * 200 + "<b>x</b>" + "y</span>" * 200
+        self.assertEqual(node.to_html(), expected)
+
+    def test_write_html(self):
+        children = [LeafNode("span", f"child_{i}") for i in range(100)]
+        parent_node = ParentNode("div", children, {"class": "list"})
+        out = io.StringIO()
+        parent_node.write_html(out)
+        self.assertEqual(out.getvalue(), parent_node.to_html())
+
+    def test_write_html_in_chunks(self):
+        writes = []
+        class Sink:
+            def write(self, s):
+                writes.append(s)
+        parent_node = ParentNode("div", [LeafNode("span", f"child_{i}") for i in range(100)])
+        parent_node.write_html(Sink(), chunk_size=64)
+        self.assertGreater(len(writes), 10)
+        self.assertTrue(all(len(w) < 64 + 30 for w in writes))
+        self.assertEqual("".join(writes), parent_node.to_html())
+
+    def test_nodes_have_no_dict(self):
+        leaf = LeafNode("a", "link", {"href": "/"})
+        parent = ParentNode("p", [leaf])
+        self.assertFalse(hasattr(leaf, "__dict__"))
+        self.assertFalse(hasattr(parent, "__dict__"))
+        self.assertEqual((leaf.tag, leaf.value, leaf.children, leaf.props), ("a", "link", None, {"href": "/"}))
+        with self.assertRaises(AttributeError):
+            leaf.colour = "red"
+
+    def test_write_html_leaf(self):
+        out = io.StringIO()
+        LeafNode("b", "bold").write_html(out)
+        self.assertEqual(out.getvalue(), "<b>bold</b>")
+
+    def test_props_are_escaped(self):
+        node = LeafNode("a", "link", {"href": "/search?q=1&sort=new", "title": 'say "hi" <now>'})
+        self.assertEqual(node.to_html(),
+                         '<a href="/search?q=1&amp;sort=new" title="say &quot;hi&quot; &lt;now&gt;">link</a>')
+        self.assertEqual(LeafNode("td", "x", {"colspan": 2}).to_html(), '<td colspan="2">x</td>')
+        self.assertEqual(ParentNode("div", [LeafNode(None, "x")], {"class": "a&b"}).to_html(), '<div class="a&amp;b">x</div>')
+
+    def test_props_html_is_shared(self):
+        node = LeafNode("a", "link", {"href": "/cached"})
+        self.assertEqual(node.to_html(), '<a href="/cached">link</a>')
+        html = node.props_to_html()
+        self.assertEqual(html, ' href="/cached"')
+        self.assertIs(node.props_to_html(), html)
+        self.assertIs(LeafNode("a", "other", {"href": "/cached"}).props_to_html(), html)
+
+    def test_unhashable_prop_value(self):
+        self.assertEqual(LeafNode("div", "x", {"class": ["a", "b"]}).to_html(), '<div class="[\'a\', \'b\']">x</div>')
+
+    def test_props_changed_through_shared_dict(self):
+        props = {"href": "a"}
+        node = LeafNode("a", "x", props)
+        self.assertEqual(node.to_html(), '<a href="a">x</a>')
+        props["href"] = "b"
+        self.assertEqual(node.to_html(), '<a href="b">x</a>')
+        repr(node)
+        props["href"] = "c"
+        self.assertEqual(node.to_html(), '<a href="c">x</a>')
+        del props["href"]
+        self.assertEqual(node.to_html(), "<a>x</a>")
+
+    def test_changing_props_in_place(self):
+        node = LeafNode("a", "link", {"href": "/"})
+        node.to_html()
+        node.props["href"] = "/about"
+        node.props["rel"] = "next"
+        self.assertEqual(node.to_html(), '<a href="/about" rel="next">link</a>')
+
+    def test_reassigning_props(self):
+        node = ParentNode("p", [LeafNode(None, "x")], {"class": "old"})
+        node.to_html()
+        node.props = {"class": "new"}
+        self.assertEqual(node.to_html(), '<p class="new">x</p>')
+        node.props = None
+        self.assertEqual(node.to_html(), "<p>x</p>")
+
+    def test_deep_nesting(self):
+        depth = 20000
+        node = LeafNode("b", "bottom")
+        for level in range(depth):
+            node = ParentNode("blockquote" if level % 2 else "li", [LeafNode(None, str(level)), node])
+        expected = []
+        for level in reversed(range(depth)):
+            expected.append(f"<{'blockquote' if level % 2 else 'li'}>{level}")
+        expected.append("<b>bottom</b>")
+        for level in range(depth):
+            expected.append(f"</{'blockquote' if level % 2 else 'li'}>")
+        self.assertEqual(node.to_html(), "".join(expected))
+        out = io.StringIO()
+        node.write_html(out, chunk_size=4096)
+        self.assertEqual(out.getvalue(), "".join(expected))
+
+    def test_deep_single_child_chain(self):
+        node = LeafNode("i", "x", {"class": "deep"})
+        for _ in range(50000):
+            node = ParentNode("div", [node])
+        self.assertEqual(node.to_html(), "<div>" * 50000 + '<i class="deep">x</i>' + "</div>" * 50000)
+
+    def test_deep_error(self):
+        node = ParentNode("p", [LeafNode(None, "x")])
+        node.children[0] = ParentNode("span", [])
+        for _ in range(10000):
+            node = ParentNode("div", [LeafNode(None, "x"), node])
+        with self.assertRaisesRegex(ValueError, "Must have children"):
+            node.to_html()
+
+    def test_deep_custom_nodes(self):
+        class Upper(ParentNode):
+            __slots__ = ()
+            def render_into(self, buf):
+                buf.append(ParentNode(self.tag.upper(), self.children).to_html())
+
+        class Section(ParentNode):
+            __slots__ = ()
+
+        node = LeafNode(None, "x")
+        for level in range(12000):
+            node = (Section if level % 3 else ParentNode)("div", [node, LeafNode("br", "-")])
+        html = ParentNode("main", [node, Upper("em", [LeafNode(None, "y")])]).to_html()
+        self.assertEqual(html, "<main>" + "<div>" * 12000 + "x" + "<br>-</br></div>" * 12000 + "<EM>y</EM></main>")
+
+    def test_common_attributes_are_interned(self):
+        first = LeafNode("a", "home", {"href": "/"}).props_to_html()
+        second = LeafNode("a", "home again", {"href": "/"}).props_to_html()
+        self.assertIs(first, second)
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
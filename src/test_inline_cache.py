@@ -0,0 +1,75 @@
+import unittest
+from inline_cache import InlineCache, worker_cache
+from md_to_blocks import markdown_to_html_node, text_to_children
+
+
+def leaves(nodes):
+    return [(n.tag, n.value, n.props) for n in nodes]
+
+
+class TestInlineCache(unittest.TestCase):
+    def test_same_children_as_text_to_children(self):
+        cache = InlineCache()
+        text = "**bold** and *italic* with ![img](a.png) and [link](b.com)"
+        first = cache.children(text)
+        second = cache.children(text)
+        self.assertEqual(leaves(first), leaves(text_to_children(text)))
+        self.assertEqual(leaves(second), leaves(first))
+        self.assertEqual(cache.stats()["hits"], 1)
+        self.assertEqual(cache.stats()["misses"], 1)
+
+    def test_nodes_are_not_shared(self):
+        cache = InlineCache()
+        first = cache.children("see ![img](a.png)")
+        first[1].props["src"] = "changed.png"
+        first[0].value = "changed"
+        second = cache.children("see ![img](a.png)")
+        self.assertIsNot(first[1], second[1])
+        self.assertEqual(second[0].value, "see ")
+        self.assertEqual(second[1].props, {"src": "a.png", "alt": "img"})
+
+    def test_evicts_least_recently_used(self):
+        cache = InlineCache()
+        cache.children("a")
+        size = cache.bytes
+        cache = InlineCache(max_bytes=2 * size)
+        cache.children("a")
+        cache.children("b")
+        cache.children("a")
+        cache.children("c")
+        self.assertEqual(list(cache.entries), ["a", "c"])
+        self.assertEqual(cache.stats()["evictions"], 1)
+        self.assertLessEqual(cache.bytes, cache.max_bytes)
+
+    def test_too_big_is_not_cached(self):
+        cache = InlineCache(max_bytes=100)
+        cache.children("x" * 1000)
+        self.assertEqual(cache.stats()["entries"], 0)
+        self.assertEqual(cache.stats()["bytes"], 0)
+
+    def test_errors_are_not_cached(self):
+        cache = InlineCache()
+        for _ in range(2):
+            with self.assertRaises(Exception):
+                cache.children("**unmatched")
+        self.assertEqual(cache.stats()["misses"], 2)
+        self.assertEqual(cache.stats()["entries"], 0)
+
+    def test_markdown_to_html_node(self):
+        md = "# Title\n\n" + "\n".join(f"- item **{i % 3}**" for i in range(30)) + "\n\n> quote *here*\n\nsame **para**\n\nsame **para**"
+        cache = InlineCache()
+        self.assertEqual(markdown_to_html_node(md, cache).to_html(), markdown_to_html_node(md).to_html())
+        self.assertEqual(cache.stats()["misses"], 6)
+        self.assertEqual(cache.stats()["hits"], 28)
+
+    def test_worker_cache(self):
+        self.assertIsNone(worker_cache(None))
+        cache = worker_cache(1024)
+        self.assertIs(worker_cache(1024), cache)
+        other = worker_cache(2048)
+        self.assertIsNot(other, cache)
+        self.assertEqual(other.max_bytes, 2048)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,4 +1,10 @@
+import io
+import os
+import random
+import re
 import unittest
+from testutil import TempDirTestCase
+from inline_cache import InlineCache
 from md_to_blocks import *
 
 class TestMDtoHTML(unittest.TestCase):
@@ -54,6 +60,36 @@ the **same** even with inline stuff
         sample2="``Missing```"
         self.assertEqual(block_to_block_type(sample2), BlockType.PARA) 
 
+    def test_long_ordered_list(self):
+        olist = "\n".join(f"{i}. item" for i in range(1, 13))
+        self.assertEqual(block_to_block_type(olist), BlockType.OLIST)
+        self.assertEqual(block_to_block_type(olist.replace("11.", "12.")), BlockType.PARA)
+
+    def test_empty_block(self):
+        self.assertEqual(block_to_block_type(""), BlockType.PARA)
+
+    def test_same_as_line_by_line_checks(self):
+        """Random blocks get the same type as the cascade of checks block_to_block_type used to run"""
+        def cascade(block):
+            lines = block.split("\n")
+            if re.search(r"(^#{1,6} )", block):
+                return BlockType.HEADING
+            if len(lines) > 1 and lines[0].startswith("```") and lines[-1].startswith("```"):
+                return BlockType.CODEBLOCK
+            if all(line.startswith('>') for line in lines):
+                return BlockType.QUOTEBLOCK
+            if all(line.startswith('- ') for line in lines):
+                return BlockType.ULIST
+            for i in range(len(lines)):
+                if not lines[i].startswith(f"{i + 1}."):
+                    return BlockType.PARA
+            return BlockType.OLIST
+        rng = random.Random(2)
+        pieces = ["#", "# ", "##", "```", "`", "\n", ">", "> ", "-", "- ", "1.", "2.", "3.", "1", "x", " ", "10."]
+        for _ in range(5000):
+            block = "".join(rng.choice(pieces) for _ in range(rng.randint(0, 10)))
+            self.assertEqual(block_to_block_type(block), cascade(block), msg=repr(block))
+
 class TestMarkdownToBlocks(unittest.TestCase):
     def test_markdown_to_blocks(self):
         md = """
@@ -174,6 +210,99 @@ Goodbye.
         
 
 
+class TestIterBlocks(unittest.TestCase):
+    def test_file_object(self):
+        f = io.StringIO("# Title\n\nfirst para\nsame para\n\n\n\n- a\n- b\n")
+        self.assertEqual(list(iter_blocks(f)), ["# Title", "first para\nsame para", "- a\n- b"])
+
+    def test_blocks_come_out_as_they_end(self):
+        def lines():
+            yield "first"
+            yield ""
+            raise RuntimeError("read too far")
+        blocks = iter_blocks(lines())
+        self.assertEqual(next(blocks), "first")
+
+    def test_codeblock_with_blank_lines(self):
+        doc = "intro\n\n```\ndef f():\n\n    return 1\n```\n\nafter"
+        self.assertEqual(markdown_to_blocks(doc), ["intro", "```\ndef f():\n\n    return 1\n```", "after"])
+
+    def test_inline_fence_does_not_open(self):
+        self.assertEqual(markdown_to_blocks("```x```\n\nnext"), ["```x```", "next"])
+
+    def test_unclosed_fence_runs_to_the_end(self):
+        self.assertEqual(markdown_to_blocks("```\na\n\nb"), ["```\na\n\nb"])
+
+    def test_whitespace_only_blocks_are_dropped(self):
+        self.assertEqual(markdown_to_blocks("a\n\n   \n\nb"), ["a", "b"])
+
+
+class TestIterMmapBlocks(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.path = os.path.join(self.tmp.name, "page.md")
+
+    def blocks(self, doc, newline="\n"):
+        with open(self.path, "w", encoding="utf-8", newline=newline) as f:
+            f.write(doc)
+        return list(iter_mmap_blocks(self.path))
+
+    def test_same_as_iter_blocks(self):
+        doc = "\n\n# Title\n\npara **é**\nline\n\n\n  \n\n```py\ncode\n\n  ```\nafter fence\n\n- a\n- b\n"
+        self.assertEqual(self.blocks(doc), list(iter_blocks(io.StringIO(doc))))
+
+    def test_windows_line_endings(self):
+        self.assertEqual(self.blocks("one\ntwo\n\nthree\n", newline="\r\n"), ["one\ntwo", "three"])
+
+    def test_unclosed_fence(self):
+        self.assertEqual(self.blocks("```\na\n\nb\n"), ["```\na\n\nb"])
+
+    def test_empty_file(self):
+        self.assertEqual(self.blocks(""), [])
+
+
+class TestWriteMarkdownHTML(unittest.TestCase):
+    def test_same_as_markdown_to_html_node(self):
+        md = "# Title\n\nsome **bold**\n\n```\ncode\n\nmore\n```\n\n> quote\n\n1. one\n2. two"
+        out = io.StringIO()
+        write_markdown_html(io.StringIO(md), out)
+        self.assertEqual(out.getvalue(), markdown_to_html_node(md).to_html())
+
+    def test_empty_document(self):
+        with self.assertRaises(ValueError):
+            write_markdown_html(io.StringIO("\n\n"), io.StringIO())
+
+
+class TestParallelMarkdownToHTML(unittest.TestCase):
+    def setUp(self):
+        parts = []
+        for i in range(60):
+            parts.append(f"## Release {i}")
+            parts.append("\n".join(f"- fixed **issue** {i}.{j} in `module_{j}`" for j in range(5)))
+            parts.append("```\ncode\n\nwith a blank line\n```")
+            parts.append(f"See [the notes](https://example.com/{i}) for *details*.\n> not a quote")
+        self.md = "\n\n".join(parts)
+
+    def test_same_html_as_serial(self):
+        expected = markdown_to_html_node(self.md).to_html()
+        node = markdown_to_html_node(self.md, jobs=2, chunk_size=500)
+        self.assertGreater(len(node.children), 2)
+        self.assertEqual(node.to_html(), expected)
+
+    def test_with_inline_cache(self):
+        expected = markdown_to_html_node(self.md).to_html()
+        cache = InlineCache(1024 * 1024)
+        self.assertEqual(markdown_to_html_node(self.md, cache, jobs=2, chunk_size=500).to_html(), expected)
+
+    def test_small_document_stays_serial(self):
+        node = markdown_to_html_node("# Title\n\ntext", jobs=4)
+        self.assertEqual([child.tag for child in node.children], ["h1", "p"])
+
+    def test_chunk_blocks(self):
+        self.assertEqual(chunk_blocks(["aa", "bb", "c", "dddd", "e"], 3), [["aa", "bb"], ["c", "dddd"], ["e"]])
+        self.assertEqual(chunk_blocks([], 3), [])
+
+
 class TestTextToChildren(unittest.TestCase):
     def test_text_to_children_plain_text(self):
         result = text_to_children("Hello world")
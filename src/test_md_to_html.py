@@ -33,4 +33,20 @@ the **same** even with inline stuff
         self.assertEqual(
             html,
             "<div><pre><code>This is text that *should* remain\nthe **same** even with inline stuff\n</code></pre></div>"
-        )
\ No newline at end of file
+        )
+
+    def test_codeblock_with_blank_line(self):
+        md = """
+```
+first line
+
+after a blank line
+```
+"""
+
+        node = markdown_to_html_node(md)
+        html = node.to_html()
+        self.assertEqual(
+            html,
+            "<div><pre><code>first line\n\nafter a blank line\n</code></pre></div>"
+        )
@@ -1,7 +1,25 @@
+import ast
+import random
 import unittest
 from textnode import TextNode, TextType
 from md_to_text_node import *
 
+
+def text_to_text_node_passes(text):
+    """ text_to_text_node as it was, one split_nodes_* pass after the other """
+    nodes = split_nodes_delimiter([TextNode(text, TextType.TEXT)], "**", TextType.BOLD)
+    nodes = split_nodes_delimiter(nodes, '*', TextType.ITALIC)
+    nodes = split_nodes_delimiter(nodes, '`', TextType.CODE)
+    nodes = split_nodes_image(nodes)
+    return split_nodes_link(nodes)
+
+
+def outcome(fn, text):
+    try:
+        return fn(text)
+    except Exception as e:
+        return repr(e)
+
 class TestSplitNodesDelimiter(unittest.TestCase):
     
     def test_split_nodes_delimiter_basic_bold(self):
@@ -202,6 +220,20 @@ class TestExtractImage(unittest.TestCase):
         )
         self.assertListEqual([("my link", "https://i.imgur.com/zjjcJKZ.png"),("click me!!!", "valve.com")], matches)
         
+    def test_iter_markdown_images(self):
+        text = "An ![image](a.png) and ![other](b.png) but not [a link](c.com)"
+        matches = list(iter_markdown_images(text))
+        self.assertEqual([m.groups() for m in matches], [("image", "a.png"), ("other", "b.png")])
+        self.assertEqual(text[slice(*matches[0].span())], "![image](a.png)")
+        self.assertEqual([m.groups() for m in matches], extract_markdown_images(text))
+
+    def test_iter_markdown_links(self):
+        text = "A [link](a.com), an ![image](b.png) and [another](c.com)"
+        matches = list(iter_markdown_links(text))
+        self.assertEqual([m.groups() for m in matches], [("link", "a.com"), ("another", "c.com")])
+        self.assertEqual(matches[1].start(), text.index("[another]"))
+        self.assertEqual([m.groups() for m in matches], extract_markdown_link(text))
+
     def test_split_images(self):
         node = TextNode(
             "This is text with an ![image](https://i.imgur.com/zjjcJKZ.png) and another ![second image](https://i.imgur.com/3elNhQu.png)",
@@ -475,6 +507,21 @@ class TestSplitNodesLink(unittest.TestCase):
         ]
         self.assertEqual(new_nodes, expected)
 
+    def test_split_nodes_link_same_text_as_image(self):
+        """The link is cut where it was matched, not at the first place its text shows up"""
+        node = TextNode("![a](b) and [a](b)", TextType.TEXT)
+        expected = [
+            TextNode("![a](b) and ", TextType.TEXT),
+            TextNode("a", TextType.IMAGE, "b"),
+        ]
+        self.assertEqual(split_nodes_link([node]), expected)
+
+    def test_split_nodes_link_many_links(self):
+        node = TextNode(" ".join(f"[l{i}](u{i})" for i in range(1000)), TextType.TEXT)
+        new_nodes = split_nodes_link([node])
+        self.assertEqual(len(new_nodes), 1999)
+        self.assertEqual(new_nodes[-1], TextNode("l999", TextType.IMAGE, "u999"))
+
 class TestTextToTextNode(unittest.TestCase):
     def test_text_to_text_node_plain_text(self):
         """Test plain text with no formatting"""
@@ -592,5 +639,34 @@ class TestTextToTextNode(unittest.TestCase):
         self.assertEqual(result, expected)
 
 
+class TestSinglePassEquivalence(unittest.TestCase):
+    def assertSameAsPasses(self, text):
+        self.assertEqual(outcome(text_to_text_node, text), outcome(text_to_text_node_passes, text), msg=repr(text))
+
+    def test_corpus(self):
+        """Every string literal of this test file gives the same result both ways"""
+        with open(__file__) as f:
+            tree = ast.parse(f.read())
+        corpus = [n.value for n in ast.walk(tree) if isinstance(n, ast.Constant) and isinstance(n.value, str)]
+        self.assertGreater(len(corpus), 100)
+        for text in corpus:
+            self.assertSameAsPasses(text)
+
+    def test_random_markup(self):
+        rng = random.Random(7)
+        pieces = ["a", "b c", " ", "*", "**", "`", "!", "[", "]", "(", ")", "![a](b)", "[c](d)", "![", "]("]
+        for _ in range(5000):
+            self.assertSameAsPasses("".join(rng.choice(pieces) for _ in range(rng.randint(0, 14))))
+
+    def test_unmatched_delimiters(self):
+        for text in ["a*b**c**d", "`a*b*c`", "**a", "*a", "`a", "***x***", "a****b*"]:
+            with self.assertRaises(Exception, msg=text):
+                text_to_text_node(text)
+
+    def test_empty_delimiters_are_dropped(self):
+        self.assertEqual(text_to_text_node("a****b"), [TextNode("a", TextType.TEXT), TextNode("b", TextType.TEXT)])
+        self.assertEqual(text_to_text_node("****"), [])
+
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
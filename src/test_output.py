@@ -0,0 +1,149 @@
+import asyncio
+import hashlib
+import os
+import threading
+import time
+import unittest
+from unittest import mock
+from testutil import TempDirTestCase, read_bytes
+from output import *
+
+
+class TestWriteFile(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.path = os.path.join(self.tmp.name, "blog", "post.html")
+
+    def test_writes_new_file(self):
+        wrote, entry = write_file(self.path, b"<p>post</p>")
+        self.assertTrue(wrote)
+        self.assertEqual(entry, {"size": 11, "mtime_ns": os.stat(self.path).st_mtime_ns,
+                                 "sha256": hashlib.sha256(b"<p>post</p>").hexdigest()})
+        self.assertEqual(read_bytes(self.path), b"<p>post</p>")
+        self.assertEqual(os.listdir(os.path.dirname(self.path)), ["post.html"])
+
+    def test_same_bytes_are_not_written(self):
+        write_file(self.path, b"<p>post</p>")
+        os.utime(self.path, ns=(0, 0))
+        self.assertFalse(write_file(self.path, b"<p>post</p>")[0])
+        self.assertEqual(os.stat(self.path).st_mtime_ns, 0)
+
+    def test_changed_bytes_are_written(self):
+        write_file(self.path, b"<p>post</p>")
+        # same size, different content
+        self.assertTrue(write_file(self.path, b"<p>page</p>")[0])
+        self.assertEqual(read_bytes(self.path), b"<p>page</p>")
+
+    def test_known_entry_skips_without_reading(self):
+        entry = write_file(self.path, b"<p>post</p>")[1]
+        with mock.patch("output.same_content") as same_content:
+            self.assertEqual(write_file(self.path, b"<p>post</p>", known=entry), (False, entry))
+            self.assertTrue(write_file(self.path, b"<p>page</p>", known=entry)[0])
+        same_content.assert_not_called()
+        self.assertEqual(read_bytes(self.path), b"<p>page</p>")
+
+    def test_file_written_since_is_compared(self):
+        entry = write_file(self.path, b"<p>post</p>")[1]
+        # another writer put something of the same size there
+        with open(self.path, "wb") as f:
+            f.write(b"<p>page</p>")
+        os.utime(self.path, ns=(0, 0))
+        self.assertTrue(write_file(self.path, b"<p>post</p>", known=entry)[0])
+        self.assertEqual(read_bytes(self.path), b"<p>post</p>")
+
+    def test_known_entry_of_missing_file(self):
+        entry = {"size": 11, "mtime_ns": 0, "sha256": hashlib.sha256(b"<p>post</p>").hexdigest()}
+        self.assertTrue(write_file(self.path, b"<p>post</p>", known=entry)[0])
+        self.assertEqual(read_bytes(self.path), b"<p>post</p>")
+
+    def test_replaces_instead_of_writing_through(self):
+        write_file(self.path, b"old")
+        link = os.path.join(self.tmp.name, "link.html")
+        os.link(self.path, link)
+        write_file(self.path, b"new")
+        self.assertEqual(read_bytes(link), b"old")
+
+    def test_failed_write_leaves_old_file(self):
+        write_file(self.path, b"old")
+        with mock.patch("output.os.replace", side_effect=OSError("disk full")):
+            with self.assertRaises(OSError):
+                write_file(self.path, b"new")
+        self.assertEqual(read_bytes(self.path), b"old")
+        self.assertEqual(os.listdir(os.path.dirname(self.path)), ["post.html"])
+
+
+class TestWriteOutputs(TempDirTestCase):
+    def outputs(self, n):
+        return [(os.path.join(self.tmp.name, f"page{i}.html"), f"<p>{i}</p>".encode()) for i in range(n)]
+
+    def test_writes_everything(self):
+        outputs = self.outputs(50)
+        stats = asyncio.run(write_outputs(iter(outputs), concurrency=4))
+        self.assertEqual((stats["files"], stats["written"], stats["unchanged"]), (50, 50, 0))
+        self.assertEqual(stats["bytes"], sum(len(data) for _, data in outputs))
+        for path, data in outputs:
+            self.assertEqual(read_bytes(path), data)
+
+    def test_counts_unchanged(self):
+        outputs = self.outputs(10)
+        asyncio.run(write_outputs(iter(outputs[:6])))
+        stats = asyncio.run(write_outputs(iter(outputs)))
+        self.assertEqual((stats["written"], stats["unchanged"]), (4, 6))
+        self.assertEqual(sorted(stats["changed"]), sorted(path for path, _ in outputs[6:]))
+
+    def test_known_entries(self):
+        outputs = self.outputs(4)
+        entries = asyncio.run(write_outputs(iter(outputs)))["entries"]
+        self.assertEqual({path: entry["sha256"] for path, entry in entries.items()},
+                         {path: hashlib.sha256(data).hexdigest() for path, data in outputs})
+        path = outputs[0][0]
+        outputs[0] = (path, b"<p>edited</p>")
+        stats = asyncio.run(write_outputs(iter(outputs), known=entries))
+        self.assertEqual(stats["changed"], [path])
+        self.assertEqual(read_bytes(path), b"<p>edited</p>")
+
+    def test_concurrency_is_bounded(self):
+        lock = threading.Lock()
+        running = [0, 0]
+
+        def slow_write(path, data, known=None):
+            with lock:
+                running[0] += 1
+                running[1] = max(running)
+            time.sleep(0.01)
+            with lock:
+                running[0] -= 1
+            return True, ""
+
+        with mock.patch("output.write_file", slow_write):
+            stats = asyncio.run(write_outputs(iter(self.outputs(20)), concurrency=3))
+        self.assertEqual(stats["written"], 20)
+        self.assertEqual(running[1], 3)
+        self.assertGreater(stats["waited"], 0)
+
+    def test_write_error_is_raised(self):
+        def failing_write(path, data, known=None):
+            if path.endswith("page3.html"):
+                raise OSError("disk full")
+            return write_file(path, data)
+
+        with mock.patch("output.write_file", failing_write):
+            with self.assertRaisesRegex(OSError, "disk full"):
+                asyncio.run(write_outputs(iter(self.outputs(10)), concurrency=2))
+
+    def test_render_error_waits_for_started_writes(self):
+        outputs = self.outputs(3)
+
+        def rendered():
+            yield from outputs
+            raise ValueError("broken page")
+
+        with self.assertRaisesRegex(ValueError, "broken page"):
+            asyncio.run(write_outputs(rendered()))
+        for path, data in outputs:
+            self.assertEqual(read_bytes(path), data)
+        self.assertFalse([name for name in os.listdir(self.tmp.name) if name.endswith(".tmp")])
+
+
+if __name__ == "__main__":
+    unittest.main()
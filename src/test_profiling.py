@@ -0,0 +1,87 @@
+import io
+import os
+import unittest
+import build
+import md_to_blocks
+import profiling
+from testutil import TempDirTestCase, write, read
+from build import build_pages, find_pages, output_path
+
+
+class TestProfiling(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.content = os.path.join(self.tmp.name, "content")
+        self.public = os.path.join(self.tmp.name, "public")
+        for i in range(6):
+            write(os.path.join(self.content, f"post{i}.md"), "\n\n".join([f"# Post {i}", f"- item *{i}*\n- other", "text"] * (i + 1)))
+
+    def tearDown(self):
+        profiling.disable()
+
+    def test_off_by_default(self):
+        original = md_to_blocks.block_to_block_type
+        self.assertIsNone(profiling.active)
+        profiling.enable()
+        self.assertIsNot(md_to_blocks.block_to_block_type, original)
+        # replaced in the modules that imported it too
+        self.assertIs(build.file_hash.__wrapped__, profiling.assets.file_hash.__wrapped__)
+        profiling.disable()
+        self.assertIs(md_to_blocks.block_to_block_type, original)
+        self.assertIsNone(profiling.active)
+
+    def test_stages_are_counted(self):
+        profiler = profiling.enable()
+        html = md_to_blocks.markdown_to_html_node("# Title\n\nsome *text*\n\n- a\n- b").to_html()
+        self.assertEqual(html, "<div><h1>Title</h1><p>some <i>text</i></p><ul><li>a</li><li>b</li></ul></div>")
+        stages = profiler.to_dict()["stages"]
+        self.assertEqual(stages["blocks"]["calls"], 3)
+        self.assertEqual(stages["classify"]["calls"], 3)
+        self.assertEqual(stages["inline"]["calls"], 4)
+        self.assertEqual(stages["render"], {"calls": 1, "seconds": stages["render"]["seconds"], "bytes": len(html)})
+
+    def test_streamed_render_counts_characters(self):
+        profiler = profiling.enable()
+        out = io.StringIO()
+        md_to_blocks.markdown_to_html_node("# Title\n\nsome *text*").write_html(out, chunk_size=8)
+        stages = profiler.to_dict()["stages"]
+        self.assertEqual(stages["render"]["calls"], 1)
+        self.assertEqual(stages["render"]["bytes"], len(out.getvalue()))
+
+    def check_build(self, jobs):
+        expected = os.path.join(self.tmp.name, "expected")
+        build_pages(self.content, expected, jobs=1)
+        report = build_pages(self.content, self.public, jobs=jobs, chunk_size=2, profile=True)
+        self.assertIsNone(profiling.active)
+        profile = report["profile"]
+        self.assertEqual(sorted(profile["pages"]), find_pages(self.content))
+        self.assertEqual(profile["stages"]["page"]["calls"], 6)
+        self.assertEqual(profile["stages"]["classify"]["calls"], 3 * (1 + 2 + 3 + 4 + 5 + 6))
+        for rel, page in profile["pages"].items():
+            self.assertEqual(page["bytes"], os.path.getsize(os.path.join(self.public, output_path(rel))))
+            self.assertIn("inline", page["stages"])
+            # everything but the <div></div> around the blocks
+            self.assertEqual(page["stages"]["render"]["bytes"], page["bytes"] - len("<div></div>"))
+            self.assertEqual(read(os.path.join(self.public, output_path(rel))), read(os.path.join(expected, output_path(rel))))
+
+    def test_serial_build(self):
+        self.check_build(1)
+
+    def test_parallel_build(self):
+        self.check_build(2)
+
+    def test_build_keeps_an_active_profiler(self):
+        profiler = profiling.enable()
+        build_pages(self.content, self.public, jobs=1, profile=True)
+        self.assertIs(profiling.active, profiler)
+        self.assertEqual(len(profiler.to_dict()["pages"]), 6)
+
+    def test_format_profile(self):
+        report = build_pages(self.content, self.public, jobs=1, profile=True)
+        summary = profiling.format_profile(report["profile"], top=2)
+        self.assertIn("slowest 2 pages:", summary)
+        self.assertEqual(len(summary.split("slowest")[1].splitlines()), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,58 @@
+import unittest
+from html_node import LeafNode, ParentNode
+from md_to_blocks import markdown_to_html_node
+from render_plan import *
+
+
+class TestRenderPlan(unittest.TestCase):
+    def test_same_html_as_to_html(self):
+        node = markdown_to_html_node("# Title\n\nsome **bold** and [a link](https://a.b/?x=1&y=2)\n\n- one\n- two\n\n```\ncode\n```")
+        plan = compile_plan(node)
+        self.assertEqual(plan.segments, [node.to_html()])
+        self.assertEqual(plan.render(), node.to_html())
+
+    def test_slots(self):
+        page = ParentNode("html", [
+            ParentNode("head", [ParentNode("title", [Slot("title")])]),
+            ParentNode("body", [LeafNode("h1", "Site"), Slot("content"), LeafNode("footer", "bye")], {"class": "page"}),
+        ])
+        plan = compile_plan(page)
+        self.assertEqual(plan.segments, ["<html><head><title>", "", "</title></head><body class=\"page\"><h1>Site</h1>", "",
+                                         "<footer>bye</footer></body></html>"])
+        self.assertEqual(plan.slots, {"title": [1], "content": [3]})
+        html = plan.render(title="Home", content=ParentNode("p", [LeafNode("b", "hi")]))
+        self.assertEqual(html, '<html><head><title>Home</title></head><body class="page"><h1>Site</h1>'
+                               '<p><b>hi</b></p><footer>bye</footer></body></html>')
+        self.assertEqual(plan.render(title="Other", content=""), '<html><head><title>Other</title></head>'
+                         '<body class="page"><h1>Site</h1><footer>bye</footer></body></html>')
+
+    def test_repeated_slot(self):
+        plan = compile_plan(ParentNode("div", [Slot("name"), LeafNode("hr", "-"), Slot("name")]))
+        self.assertEqual(plan.slots, {"name": [1, 3]})
+        self.assertEqual(plan.render(name="x"), "<div>x<hr>-</hr>x</div>")
+
+    def test_missing_slot_value(self):
+        plan = compile_plan(ParentNode("div", [Slot("content")]))
+        with self.assertRaises(ValueError):
+            plan.render()
+
+    def test_slot_outside_a_plan(self):
+        with self.assertRaises(ValueError):
+            ParentNode("div", [Slot("content")]).to_html()
+
+    def test_deep_slot(self):
+        node = Slot("bottom")
+        for _ in range(15000):
+            node = ParentNode("div", [node])
+        plan = compile_plan(node)
+        self.assertEqual(plan.render(bottom="x"), "<div>" * 15000 + "x" + "</div>" * 15000)
+
+    def test_plan_is_a_snapshot(self):
+        node = ParentNode("p", [LeafNode("b", "before")])
+        plan = compile_plan(node)
+        node.children.append(LeafNode(None, "after"))
+        self.assertEqual(plan.render(), "<p><b>before</b></p>")
+
+
+if __name__ == "__main__":
+    unittest.main()
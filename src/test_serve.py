@@ -0,0 +1,138 @@
+import http.client
+import os
+import threading
+import unittest
+from testutil import TempDirTestCase, write
+from serve import *
+
+
+class TestDevSite(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.static = os.path.join(self.tmp.name, "static")
+        self.content = os.path.join(self.tmp.name, "content")
+        write(os.path.join(self.content, "index.md"), "# Home")
+        write(os.path.join(self.content, "blog", "post.md"), "a *post*")
+        write(os.path.join(self.content, "blog", "index.md"), "the blog")
+        write(os.path.join(self.static, "index.css"), "body {}")
+        self.site = DevSite(self.static, self.content)
+
+    def test_source(self):
+        self.assertEqual(self.site.source("/"), "index.md")
+        self.assertEqual(self.site.source("/blog/"), "blog/index.md")
+        self.assertEqual(self.site.source("/blog/post.html"), "blog/post.md")
+        self.assertEqual(self.site.source("/blog/post"), "blog/post.md")
+        self.assertEqual(self.site.source("/blog/post/"), "blog/post.md")
+        self.assertEqual(self.site.source("/blog/p%6Fst"), "blog/post.md")
+        self.assertIsNone(self.site.source("/index.css"))
+        self.assertIsNone(self.site.source("/missing.html"))
+        self.assertIsNone(self.site.source("/../content/index.md"))
+
+    def test_page_is_cached(self):
+        page = self.site.page("blog/post.md")
+        self.assertEqual(page.body, b"<div><p>a <i>post</i></p></div>")
+        self.assertIs(self.site.page("blog/post.md"), page)
+        self.assertEqual(self.site.cache.stats()["hits"], 1)
+        self.assertEqual(self.site.cache.stats()["misses"], 1)
+
+    def test_edited_page_is_rendered_again(self):
+        page = self.site.page("blog/post.md")
+        write(os.path.join(self.content, "blog", "post.md"), "an edited **post**")
+        edited = self.site.page("blog/post.md")
+        self.assertEqual(edited.body, b"<div><p>an edited <b>post</b></p></div>")
+        self.assertNotEqual(edited.etag, page.etag)
+
+    def test_touched_page_keeps_its_etag(self):
+        page = self.site.page("blog/post.md")
+        path = os.path.join(self.content, "blog", "post.md")
+        st = os.stat(path)
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+        self.assertEqual(self.site.page("blog/post.md").etag, page.etag)
+        self.assertEqual(self.site.cache.stats()["misses"], 1)
+
+    def test_template_change(self):
+        template = os.path.join(self.tmp.name, "template.html")
+        write(template, "<title>{{ Title }}</title>{{ Content }}")
+        site = DevSite(self.static, self.content, template)
+        self.assertEqual(site.page("index.md").body, b"<title>Home</title><div><h1>Home</h1></div>")
+        write(template, "<main>{{ Content }}</main>")
+        self.assertEqual(site.page("index.md").body, b"<main><div><h1>Home</h1></div></main>")
+
+    def test_page_of_old_template_put_late(self):
+        template = os.path.join(self.tmp.name, "template.html")
+        write(template, "<title>{{ Title }}</title>{{ Content }}")
+        site = DevSite(self.static, self.content, template)
+        old = site.page("index.md")
+        write(template, "<main>{{ Content }}</main>")
+        site.check_template()
+        # a request that started before the change puts its page after the cache was cleared
+        site.cache.put("index.md", old)
+        self.assertEqual(site.page("index.md").body, b"<main><div><h1>Home</h1></div></main>")
+
+    def test_lru_eviction(self):
+        cache = PageCache(max_bytes=10)
+        for name in "abc":
+            cache.put(name, Page(None, "", '"x"', b"12345"))
+        self.assertEqual(list(cache.entries), ["b", "c"])
+        self.assertEqual(cache.stats()["evictions"], 1)
+        cache.get("b")
+        cache.put("d", Page(None, "", '"x"', b"12345"))
+        self.assertEqual(list(cache.entries), ["b", "d"])
+
+
+class TestDevServer(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        static = os.path.join(self.tmp.name, "static")
+        content = os.path.join(self.tmp.name, "content")
+        write(os.path.join(content, "index.md"), "# Home\n\nwelcome **home**")
+        write(os.path.join(static, "images", "a.png"), "png")
+        self.server = make_server(static, content, port=0)
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.start()
+        self.conn = http.client.HTTPConnection(*self.server.server_address[:2])
+
+    def tearDown(self):
+        self.conn.close()
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+
+    def get(self, path, headers=None):
+        self.conn.request("GET", path, headers=headers or {})
+        response = self.conn.getresponse()
+        return response, response.read()
+
+    def test_page_and_not_modified(self):
+        response, body = self.get("/")
+        self.assertEqual(response.status, 200)
+        self.assertEqual(body, b"<div><h1>Home</h1><p>welcome <b>home</b></p></div>")
+        self.assertEqual(response.getheader("Content-Type"), "text/html; charset=utf-8")
+        etag = response.getheader("ETag")
+        # same connection, kept alive
+        response, body = self.get("/", {"If-None-Match": etag})
+        self.assertEqual(response.status, 304)
+        self.assertIsNone(response.getheader("Content-Length"))
+        self.assertEqual(body, b"")
+        # and the connection is still usable
+        self.assertEqual(self.get("/images/a.png")[1], b"png")
+        self.assertEqual(self.server.site.cache.stats()["misses"], 1)
+
+    def test_static_file(self):
+        response, body = self.get("/images/a.png")
+        self.assertEqual(response.status, 200)
+        self.assertEqual(body, b"png")
+
+    def test_not_found(self):
+        response, _ = self.get("/about.html")
+        self.assertEqual(response.status, 404)
+
+    def test_broken_page(self):
+        write(os.path.join(self.tmp.name, "content", "broken.md"), "**unmatched")
+        response, body = self.get("/broken.html")
+        self.assertEqual(response.status, 500)
+        self.assertIn(b"broken.md", body)
+
+
+if __name__ == "__main__":
+    unittest.main()
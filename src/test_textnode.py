@@ -33,6 +33,11 @@ class TestTextNode(unittest.TestCase):
         node = TextNode("We are number one", TextType.TEXT)
         self.assertEqual(str(node), "TextNode(We are number one, text, None)")
     
+    def test_no_dict(self):
+        node = TextNode("We are number one", TextType.TEXT)
+        self.assertFalse(hasattr(node, "__dict__"))
+        self.assertEqual(node.url, None)
+
     def test_text(self):
         node = TextNode("This is a text node", TextType.TEXT)
         html_node = text_node_to_html_node(node)
@@ -0,0 +1,160 @@
+import os
+import threading
+import time
+import unittest
+from testutil import TempDirTestCase, write, read
+from assets import sync_files
+from build import build_pages
+from watch import *
+
+
+class TestWatch(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.static = os.path.join(self.tmp.name, "static")
+        self.content = os.path.join(self.tmp.name, "content")
+        self.public = os.path.join(self.tmp.name, "public")
+        write(os.path.join(self.static, "index.css"), "body {}")
+        write(os.path.join(self.content, "index.md"), "hello")
+
+    def test_diff_snapshots(self):
+        old = snapshot(self.static)
+        write(os.path.join(self.static, "index.css"), "body { margin: 0 }")
+        write(os.path.join(self.static, "images", "a.png"), "png")
+        changed, removed = diff_snapshots(old, snapshot(self.static))
+        self.assertEqual(changed, {"index.css", "images/a.png"})
+        self.assertEqual(removed, set())
+        old = snapshot(self.static)
+        os.remove(os.path.join(self.static, "index.css"))
+        self.assertEqual(diff_snapshots(old, snapshot(self.static)), (set(), {"index.css"}))
+
+    def test_snapshot_missing_dir(self):
+        self.assertEqual(snapshot(os.path.join(self.tmp.name, "missing")), {})
+
+    def test_changes_coalesce(self):
+        changes = Changes()
+        self.assertFalse(changes)
+        changes.add({"a.md", "notes.txt"}, set(), assets=False)
+        changes.add(set(), {"a.md"}, assets=False)
+        self.assertEqual(changes.pages, set())
+        self.assertEqual(changes.removed_pages, {"a.md"})
+        changes.add({"a.md"}, set(), assets=False)
+        self.assertEqual((changes.pages, changes.removed_pages), ({"a.md"}, set()))
+
+    def test_apply_changes(self):
+        write(os.path.join(self.public, "old.html"), "old")
+        changes = Changes()
+        changes.add({"index.css"}, set(), assets=True)
+        changes.add({"index.md"}, {"old.md"}, assets=False)
+        self.assertEqual(apply_changes(changes, self.static, self.content, self.public), 3)
+        self.assertEqual(read(os.path.join(self.public, "index.css")), "body {}")
+        self.assertEqual(read(os.path.join(self.public, "index.html")), "<div><p>hello</p></div>")
+        self.assertFalse(os.path.exists(os.path.join(self.public, "old.html")))
+
+    def test_removed_symlinked_asset(self):
+        changes = Changes()
+        changes.add({"index.css"}, set(), assets=True)
+        apply_changes(changes, self.static, self.content, self.public, mode="symlink")
+        os.remove(os.path.join(self.static, "index.css"))
+        changes = Changes()
+        changes.add(set(), {"index.css"}, assets=True)
+        self.assertEqual(apply_changes(changes, self.static, self.content, self.public, mode="symlink"), 1)
+        self.assertFalse(os.path.lexists(os.path.join(self.public, "index.css")))
+
+    def test_manifest_records_the_mode(self):
+        manifest = os.path.join(self.tmp.name, ".cache", "manifest.json")
+        sync_files(self.static, self.public, manifest, mode="symlink")
+        write(os.path.join(self.static, "index.css"), "body { margin: 0 }")
+        changes = Changes()
+        changes.add({"index.css"}, set(), assets=True)
+        apply_changes(changes, self.static, self.content, self.public, mode="symlink", manifest_path=manifest)
+        self.assertEqual(sync_files(self.static, self.public, manifest, mode="copy")["copied"], 1)
+        self.assertFalse(os.path.islink(os.path.join(self.public, "index.css")))
+
+    def test_template_change_renders_every_page(self):
+        template = os.path.join(self.tmp.name, "template.html")
+        write(template, "<main>{{ Content }}</main>")
+        write(os.path.join(self.content, "blog", "post.md"), "post")
+        changes = Changes()
+        changes.template = True
+        self.assertEqual(apply_changes(changes, self.static, self.content, self.public, template), 2)
+        self.assertEqual(read(os.path.join(self.public, "blog", "post.html")), "<main><div><p>post</p></div></main>")
+
+    def test_failing_page_does_not_stop_the_others(self):
+        write(os.path.join(self.content, "a.md"), "bad **x")
+        write(os.path.join(self.content, "b.md"), "good")
+        reports = []
+        changes = Changes()
+        changes.add({"a.md", "b.md"}, set(), assets=False)
+        self.assertEqual(apply_changes(changes, self.static, self.content, self.public, report=reports.append), 1)
+        self.assertEqual(read(os.path.join(self.public, "b.html")), "<div><p>good</p></div>")
+        self.assertFalse(os.path.exists(os.path.join(self.public, "a.html")))
+        self.assertEqual(len(reports), 1)
+        self.assertTrue(reports[0].startswith("a.md: "))
+
+    def test_failing_page_with_template_change(self):
+        template = os.path.join(self.tmp.name, "template.html")
+        write(template, "<main>{{ Content }}</main>")
+        write(os.path.join(self.content, "a.md"), "bad **x")
+        reports = []
+        changes = Changes()
+        changes.template = True
+        self.assertEqual(apply_changes(changes, self.static, self.content, self.public, template, report=reports.append), 1)
+        self.assertEqual(read(os.path.join(self.public, "index.html")), "<main><div><p>hello</p></div></main>")
+        self.assertTrue(reports[0].startswith("a.md: "))
+
+    def test_next_build_sees_what_watch_wrote(self):
+        manifest = os.path.join(self.tmp.name, ".cache", "manifest.json")
+        cache = os.path.join(self.tmp.name, ".cache", "build.json")
+        page = os.path.join(self.content, "index.md")
+        css = os.path.join(self.static, "index.css")
+
+        def edit(path, content):
+            # a later mtime than the last one, whatever the resolution of the file system
+            mtime = os.stat(path).st_mtime_ns
+            write(path, content)
+            os.utime(path, ns=(mtime + 10**9, mtime + 10**9))
+
+        write(page, "version Y")
+        write(css, "Y")
+        build_pages(self.content, self.public, jobs=1, cache_path=cache)
+        sync_files(self.static, self.public, manifest)
+        edit(page, "version X")
+        edit(css, "X")
+        changes = Changes()
+        changes.add({"index.css"}, set(), assets=True)
+        changes.add({"index.md"}, set(), assets=False)
+        apply_changes(changes, self.static, self.content, self.public, manifest_path=manifest, cache_path=cache)
+        self.assertEqual(read(os.path.join(self.public, "index.html")), "<div><p>version X</p></div>")
+        edit(page, "version Y")
+        edit(css, "Y")
+        self.assertEqual(build_pages(self.content, self.public, jobs=1, cache_path=cache)["rendered"], 1)
+        self.assertEqual(sync_files(self.static, self.public, manifest)["copied"], 1)
+        self.assertEqual(read(os.path.join(self.public, "index.html")), "<div><p>version Y</p></div>")
+        self.assertEqual(read(os.path.join(self.public, "index.css")), "Y")
+        # and with nothing changed since, nothing is done again
+        self.assertEqual(build_pages(self.content, self.public, jobs=1, cache_path=cache)["rendered"], 0)
+        self.assertEqual(sync_files(self.static, self.public, manifest)["copied"], 0)
+
+    def test_watch_loop(self):
+        reports = []
+        done = threading.Event()
+        def report(line):
+            reports.append(line)
+            done.set()
+        thread = threading.Thread(target=watch, args=(self.static, self.content, self.public),
+                                  kwargs={"interval": 0.01, "debounce": 0.3, "stop": lambda: done.is_set(), "report": report})
+        thread.start()
+        time.sleep(0.05)
+        write(os.path.join(self.content, "index.md"), "hello **again**")
+        write(os.path.join(self.static, "index.css"), "body { margin: 0 }")
+        thread.join(timeout=5)
+        self.assertFalse(thread.is_alive())
+        self.assertEqual(len(reports), 1)
+        self.assertTrue(reports[0].startswith("rebuilt 2 files"))
+        self.assertEqual(read(os.path.join(self.public, "index.html")), "<div><p>hello <b>again</b></p></div>")
+        self.assertEqual(read(os.path.join(self.public, "index.css")), "body { margin: 0 }")
+
+
+if __name__ == "__main__":
+    unittest.main()
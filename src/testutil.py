@@ -0,0 +1,30 @@
+import os
+import tempfile
+import unittest
+
+"""
+What the test modules share: a test case with a temporary directory and helpers for the files in it.
+"""
+
+def write(path, content):
+    """ Writes content (str or bytes) to path, creating the directories on the way """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb" if isinstance(content, bytes) else "w") as f:
+        f.write(content)
+
+
+def read(path) -> str:
+    with open(path) as f:
+        return f.read()
+
+
+def read_bytes(path) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+
+class TempDirTestCase(unittest.TestCase):
+    """ Every test gets a fresh temporary directory, self.tmp.name, removed after its tearDown """
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
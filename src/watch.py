@@ -0,0 +1,161 @@
+import os
+import time
+from assets import scan_tree, publish_file, remove_published, remove_empty_dirs, file_entry, asset_entry, load_manifest, save_manifest
+from build import load_template, find_pages, write_page, output_path, remove_pages, record_pages
+
+"""
+Watch mode: polls static/ and the content directory with os.scandir and, after a change,
+only publishes the asset or renders the page that changed.
+Changes are coalesced: once something moved, polling goes on until nothing changed for `debounce`
+seconds, then everything seen so far is rebuilt at once.
+No native file system events are used, so it works the same everywhere.
+What a rebuild writes is recorded in the asset manifest and the build cache, the next build starts from there.
+"""
+
+def snapshot(root) -> dict:
+    """ {relative file: (mtime_ns, size)} for every file under root, empty if root doesn't exist """
+    if not os.path.isdir(root):
+        return {}
+    return {rel: (st.st_mtime_ns, st.st_size) for rel, st in scan_tree(root)[1].items()}
+
+
+def diff_snapshots(old, new) -> tuple:
+    """ Returns (changed or new files, removed files) """
+    changed = {rel for rel, sig in new.items() if old.get(rel) != sig}
+    removed = set(old) - set(new)
+    return changed, removed
+
+
+def file_signature(path):
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+class Changes:
+    """ What changed since the last rebuild, accumulated over several polls """
+    def __init__(self):
+        self.assets = set()
+        self.removed_assets = set()
+        self.pages = set()
+        self.removed_pages = set()
+        self.template = False
+
+    def __bool__(self):
+        return bool(self.assets or self.removed_assets or self.pages or self.removed_pages or self.template)
+
+    def add(self, changed, removed, assets):
+        if assets:
+            self.assets |= changed
+            self.assets -= removed
+            self.removed_assets |= removed
+            self.removed_assets -= changed
+        else:
+            changed = {rel for rel in changed if rel.endswith(".md")}
+            removed = {rel for rel in removed if rel.endswith(".md")}
+            self.pages |= changed
+            self.pages -= removed
+            self.removed_pages |= removed
+            self.removed_pages -= changed
+
+
+def apply_changes(changes, static_dir, content_dir, dst_dir, template_path=None, mode="copy", manifest_path=None,
+                  cache_path=None, report=print) -> int:
+    """
+    Publishes the changed assets and renders the changed pages. Returns how many outputs were touched.
+    An asset or a page that fails is reported ("path: error") and left out, the others are still rebuilt.
+    It is tried again when it changes next.
+    With a manifest_path (see assets.sync_files) and a cache_path (see build.build_pages), they are updated
+    with what was published and rendered, the way sync_files and build_pages would have.
+    """
+    touched = 0
+    published = {}
+    for rel in sorted(changes.assets):
+        src_path = os.path.join(static_dir, rel)
+        dst_path = os.path.join(dst_dir, rel)
+        os.makedirs(os.path.dirname(dst_path), exist_ok=True)
+        try:
+            # before publishing, a later edit of the source must not be taken for published
+            entry = asset_entry(src_path, mode)
+            publish_file(src_path, dst_path, mode)
+        except OSError as e:
+            report(f"{rel}: {e}")
+            continue
+        published[rel] = entry
+        touched += 1
+    for rel in sorted(changes.removed_assets):
+        dst_path = os.path.join(dst_dir, rel)
+        if remove_published(dst_path):
+            touched += 1
+        remove_empty_dirs(os.path.dirname(dst_path), dst_dir)
+    if manifest_path is not None and (published or changes.removed_assets):
+        manifest = load_manifest(manifest_path)
+        manifest.update(published)
+        for rel in changes.removed_assets:
+            manifest.pop(rel, None)
+        save_manifest(manifest_path, manifest)
+
+    template = load_template(template_path)
+    # every page goes through the template
+    pages = find_pages(content_dir) if changes.template else sorted(changes.pages)
+    written = {}
+    for rel in pages:
+        src_path = os.path.join(content_dir, rel)
+        try:
+            source = file_entry(src_path)
+            written[rel] = source, write_page(src_path, os.path.join(dst_dir, output_path(rel)), template)
+        except Exception as e:
+            report(f"{rel}: {e}")
+            continue
+        touched += 1
+    if cache_path is not None:
+        record_pages(cache_path, template_path, written, changes.removed_pages)
+    touched += remove_pages(dst_dir, changes.removed_pages)
+    return touched
+
+
+def watch(static_dir, content_dir, dst_dir, template_path=None, mode="copy", interval=0.2, debounce=0.3,
+          stop=lambda: False, report=print, manifest_path=None, cache_path=None):
+    """
+    Polls every interval seconds until stop() returns True, rebuilding what changed.
+    manifest_path and cache_path are kept up to date with what is rebuilt, see apply_changes.
+    report gets one line per rebuild with its latency: from the first change seen to the outputs written,
+    and one line per page or asset that failed (see apply_changes). The loop keeps going.
+    """
+    assets = snapshot(static_dir)
+    pages = snapshot(content_dir)
+    template = file_signature(template_path) if template_path else None
+    changes = Changes()
+    first_seen = last_seen = None
+    while not stop():
+        time.sleep(interval)
+        new_assets = snapshot(static_dir)
+        new_pages = snapshot(content_dir)
+        new_template = file_signature(template_path) if template_path else None
+        moved = new_assets != assets or new_pages != pages or new_template != template
+        if moved:
+            changes.add(*diff_snapshots(assets, new_assets), assets=True)
+            changes.add(*diff_snapshots(pages, new_pages), assets=False)
+            changes.template = changes.template or new_template != template
+            assets, pages, template = new_assets, new_pages, new_template
+            if changes:
+                now = time.perf_counter()
+                first_seen = first_seen or now
+                last_seen = now
+            continue
+        if not changes or time.perf_counter() - last_seen < debounce:
+            continue
+        start = time.perf_counter()
+        try:
+            touched = apply_changes(changes, static_dir, content_dir, dst_dir, template_path, mode, manifest_path,
+                                    cache_path, report)
+        except Exception as e:
+            report(f"rebuild failed: {e}")
+        else:
+            done = time.perf_counter()
+            report(f"rebuilt {touched} files in {(done - start) * 1000:.1f} ms "
+                   f"({(done - first_seen) * 1000:.1f} ms since the first change)")
+        changes = Changes()
+        first_seen = last_seen = None